@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from run_agents import AgentSpec, ModelRateLimiter, RunContext, RunJob, make_timestamp, run_chapter
+from services.backup_store import BackupStore
+from services.local_model import FILLER_SENTENCE, LOCAL_PREFIX
+from services.metrics import percentile, read_records
+from services.prompt_assembly import SECTION_TITLES
+from services.response_cache import ResponseCache
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Misst den Overhead der Agentenschleife mit lokalem Modell (ohne Netz)")
+    parser.add_argument("--chapters", type=int, default=10, help="Anzahl synthetischer Kapitel (Standard: 10)")
+    parser.add_argument("--rounds", type=int, default=3, help="Runden je Kapitel bis STATUS OK (Standard: 3)")
+    parser.add_argument("--chapter-chars", type=int, default=8000, help="Länge eines Kapitels in Zeichen")
+    parser.add_argument("--response-chars", type=int, default=8000, help="Länge einer Expertenantwort in Zeichen")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulierte Modelllatenz je Aufruf in Sekunden")
+    parser.add_argument("--concurrency", type=int, default=1, help="Gleichzeitig laufende Kapitel (Standard: 1)")
+    parser.add_argument("--backend", choices=("scripted", "replay"), default="scripted", help="Lokales Modell")
+    parser.add_argument("--replay", help="Log-Datei oder Log-Ordner für --backend replay")
+    parser.add_argument("--delta-prompts", action="store_true", help="Ab Runde 2 Entwurf bzw. Diff statt ganzem Kapitel")
+    parser.add_argument("--stream", action="store_true", help="Expertenantworten in <log>.stream.md streamen")
+    parser.add_argument("--fsync", action="store_true", help="Schreibvorgänge mit fsync (wie run_agents.py --fsync)")
+    parser.add_argument("--keep", action="store_true", help="Arbeitsordner nach dem Lauf nicht löschen")
+    return parser.parse_args()
+
+
+def write_chapters(directory: Path, count: int, chars: int) -> list[Path]:
+    paths = []
+    for index in range(1, count + 1):
+        lines = [f"# Kapitel {index}", ""]
+        size = 0
+        section = 0
+        while size < chars:
+            if section % 8 == 0:
+                lines.extend(["", f"## Abschnitt {section // 8 + 1}", ""])
+            line = f"Absatz {section + 1} in Kapitel {index}: {FILLER_SENTENCE}"
+            lines.append(line)
+            size += len(line) + 1
+            section += 1
+        path = directory / f"kapitel_{index:03d}.md"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8", newline="\n")
+        paths.append(path)
+    return paths
+
+
+def build_context(args: argparse.Namespace, workdir: Path) -> RunContext:
+    options = {
+        "latency": args.latency,
+        "response_chars": args.response_chars,
+        "ok_after": args.rounds,
+        "replay_path": str(Path(args.replay).resolve()) if args.replay else None,
+    }
+    model = f"{LOCAL_PREFIX}{args.backend}"
+    expert = AgentSpec("expert", "bench-experte", model, "", local_options=options)
+    critic = AgentSpec("critic", "bench-kritiker", model, "", local_options=options)
+    cache = ResponseCache(workdir / "cache", read_enabled=False, write_enabled=False)
+    return RunContext(
+        expert,
+        critic,
+        ModelRateLimiter(),
+        cache,
+        stream=args.stream,
+        echo_stream=False,
+        backups=BackupStore(workdir / "backups", fsync=args.fsync),
+        fsync=args.fsync,
+    )
+
+
+async def run_benchmark(args: argparse.Namespace, workdir: Path) -> tuple[dict[str, float], float]:
+    chapters = write_chapters(workdir / "docs", args.chapters, args.chapter_chars)
+    ctx = build_context(args, workdir)
+    timestamp = make_timestamp()
+    jobs = [
+        RunJob(
+            None,
+            path,
+            f"Benchmark {path.stem}",
+            args.rounds,
+            workdir / "logs" / f"{path.stem}.md",
+            timestamp,
+            delta_prompts=args.delta_prompts,
+        )
+        for path in chapters
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    walls: dict[str, float] = {}
+
+    async def run_timed(job: RunJob) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await run_chapter(job, ctx)
+            walls[str(job.chapter_path)] = time.perf_counter() - start
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_timed(job) for job in jobs))
+    return walls, time.perf_counter() - started
+
+
+def prompt_tokens_per_round(log_dir: Path) -> dict[int, int]:
+    """Sums the `prompt_tokens` line of all logs per round."""
+    totals: dict[int, int] = defaultdict(int)
+    for log in log_dir.glob("*.md"):
+        match = re.search(r"^- prompt_tokens: (.*)$", log.read_text(encoding="utf-8"), re.M)
+        for round_index, tokens in re.findall(r"Runde (\d+): (\d+)", match.group(1) if match else ""):
+            totals[int(round_index)] += int(tokens)
+    return dict(sorted(totals.items()))
+
+
+def leaked_headings(docs_dir: Path) -> list[str]:
+    """Prompt section headings that ended up in a chapter, e.g. because a section was cut wrongly."""
+    headings = {f"## {title}" for title in SECTION_TITLES}
+    return [
+        f"{path.name}:{number}: {line}"
+        for path in sorted(docs_dir.glob("*.md"))
+        for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1)
+        if line.strip() in headings
+    ]
+
+
+def report(args: argparse.Namespace, workdir: Path, walls: dict[str, float], total: float) -> list[str]:
+    records = read_records(sorted((workdir / "logs").glob("*.metrics.jsonl")))
+    calls = [record for record in records if record.get("event") == "call"]
+    runs = {record["chapter"]: record for record in records if record.get("event") == "run"}
+    model_time: dict[str, float] = defaultdict(float)
+    for call in calls:
+        model_time[call["chapter"]] += float(call.get("wall_seconds", 0)) + float(call.get("wait_seconds", 0))
+
+    # Overhead = Laufzeit je Kapitel (inkl. Log schreiben) minus Zeit im Modellaufruf, je Runde.
+    per_round = []
+    for chapter, wall in walls.items():
+        rounds = int(runs.get(chapter, {}).get("rounds", 0)) or 1
+        per_round.append((wall - model_time[chapter]) / rounds * 1000)
+    rounds_total = sum(int(run.get("rounds", 0)) for run in runs.values())
+    statuses = sorted({str(run.get("status")) for run in runs.values()})
+    tokens = prompt_tokens_per_round(workdir / "logs")
+    return [
+        f"{len(walls)} Kapitel × {args.rounds} Runden, local:{args.backend}, Latenz {args.latency:.3f} s, "
+        f"Concurrency {args.concurrency}",
+        f"Runden gesamt: {rounds_total}, Aufrufe: {len(calls)}, Status: {', '.join(statuses)}",
+        f"Gesamtzeit: {total:.2f} s, davon Modell (summiert): {sum(model_time.values()):.2f} s",
+        f"Overhead je Runde: p50 {percentile(per_round, 50):.1f} ms, p90 {percentile(per_round, 90):.1f} ms, "
+        f"max {max(per_round, default=0):.1f} ms",
+        "Prompt-Tokens je Runde: " + ", ".join(f"Runde {index}: {count}" for index, count in tokens.items()),
+    ]
+
+
+def main() -> int:
+    args = parse_args()
+    if args.chapters < 1 or args.rounds < 1 or args.concurrency < 1:
+        raise SystemExit("--chapters, --rounds und --concurrency müssen mindestens 1 sein")
+    if args.backend == "replay" and not args.replay:
+        raise SystemExit("--backend replay braucht --replay <log.md|ordner>")
+    workdir = Path(tempfile.mkdtemp(prefix="agent-bench-"))
+    (workdir / "docs").mkdir()
+    try:
+        walls, total = asyncio.run(run_benchmark(args, workdir))
+        print("\n".join(report(args, workdir, walls, total)))
+        leaked = leaked_headings(workdir / "docs")
+        if leaked:
+            print("Prompt-Überschriften im Kapitel gelandet:\n" + "\n".join(leaked))
+            return 1
+    finally:
+        if args.keep:
+            print(f"Arbeitsordner: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
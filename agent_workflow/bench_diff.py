@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import argparse
+import difflib
+import random
+import time
+from typing import Callable
+
+from services.line_diff import opcodes, unified_diff
+
+SCENARIOS = ("wenige", "viele", "tabelle", "umschrieben", "disjunkt", "gering")
+LOW_SIMILARITY_LINES = 10_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vergleicht services/line_diff mit difflib auf synthetischen Kapiteln")
+    parser.add_argument("--lines", type=int, default=10_000, help="Zeilen je Kapitel (Standard: 10000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen, gemeldet wird das Minimum")
+    parser.add_argument("--seed", type=int, default=7, help="Startwert für die Zufallsänderungen")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="Nur diese Szenarien (mehrfach möglich)")
+    return parser.parse_args()
+
+
+def synthetic_chapter(lines: int, rng: random.Random, table_share: float) -> list[str]:
+    """Headings, prose, many near-identical table rows and reference entries."""
+    result = []
+    while len(result) < lines:
+        block = rng.random()
+        if block < table_share:
+            result.append("| Nr. | Bauteil | Nenndruck | Prüfung |\n")
+            result.append("|---|---|---|---|\n")
+            for row in range(rng.randint(10, 40)):
+                result.append(f"| {row % 5 + 1} | Ventil DN{rng.choice((15, 20, 25))} | PN{rng.choice((6, 10))} | jährlich |\n")
+            result.append("\n")
+        elif block < table_share + 0.2:
+            for _ in range(rng.randint(5, 20)):
+                result.append(f"- DIN EN {rng.choice((12828, 12831, 14336))}, Ausgabe {rng.choice((2014, 2017, 2020))}\n")
+            result.append("\n")
+        else:
+            result.append(f"## Abschnitt {len(result)}\n")
+            result.append("\n")
+            for sentence in range(rng.randint(2, 8)):
+                result.append(f"Absatz {len(result)}: Die Anlage wird nach Herstellerangaben geprüft ({sentence}).\n")
+            result.append("\n")
+    return result[:lines]
+
+
+def mutate(lines: list[str], rng: random.Random, edits: int) -> list[str]:
+    result = list(lines)
+    for _ in range(edits):
+        position = rng.randrange(len(result))
+        action = rng.random()
+        if action < 0.4:
+            result[position] = result[position].rstrip("\n") + " (überarbeitet)\n"
+        elif action < 0.6:
+            del result[position : position + rng.randint(1, 5)]
+        elif action < 0.8:
+            result[position:position] = [f"Neue Zeile {rng.random():.6f}\n" for _ in range(rng.randint(1, 5))]
+        else:
+            size = rng.randint(3, 20)
+            block = result[position : position + size]
+            del result[position : position + size]
+            target = rng.randrange(len(result) + 1)
+            result[target:target] = block
+    return result
+
+
+def low_similarity(lines: list[str], rng: random.Random, keep: float) -> list[str]:
+    """Keeps only a `keep` share of the lines; the rest is rewritten."""
+    return [line if rng.random() < keep else f"Umformuliert {index}: {rng.random():.6f}\n" for index, line in enumerate(lines)]
+
+
+def apply_opcodes(a: list[str], b: list[str]) -> list[str]:
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes(a, b):
+        result.extend(a[i1:i2] if tag == "equal" else b[j1:j2])
+    return result
+
+
+def timed(function: Callable[[], str], repeat: int) -> tuple[float, str]:
+    best = float("inf")
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def difflib_without_junk(old: list[str], new: list[str]) -> str:
+    """difflib.unified_diff always uses autojunk, which drops frequent lines (table rows) from matching."""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    lines = []
+    for group in matcher.get_grouped_opcodes(3):
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend(" " + line for line in old[i1:i2])
+                continue
+            lines.extend("-" + line for line in old[i1:i2])
+            lines.extend("+" + line for line in new[j1:j2])
+    return "".join(lines)
+
+
+def count_changes(diff: str) -> int:
+    return sum(1 for line in diff.splitlines() if line[:1] in "+-" and not line.startswith(("+++", "---")))
+
+
+def main() -> int:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    def edited(table_share: float, edits: int):
+        old = synthetic_chapter(args.lines, rng, table_share)
+        return old, mutate(old, rng, edits)
+
+    def rewritten():
+        # Zwei unabhaengige Fassungen: gleiche Struktur (Leerzeilen, Tabellenkoepfe), anderer Text.
+        return synthetic_chapter(args.lines, rng, 0.3), synthetic_chapter(args.lines, rng, 0.3)
+
+    def disjoint():
+        old = synthetic_chapter(args.lines, rng, 0.3)
+        return old, [f"Neufassung {index}: {line}" for index, line in enumerate(old)]
+
+    def low():
+        old = synthetic_chapter(LOW_SIMILARITY_LINES, rng, 0.3)
+        return old, low_similarity(old, rng, 0.2)
+
+    scenarios = {
+        "wenige": lambda: edited(0.3, max(1, args.lines // 1000)),
+        "viele": lambda: edited(0.3, max(1, args.lines // 20)),
+        "tabelle": lambda: edited(0.7, max(1, args.lines // 100)),
+        "umschrieben": rewritten,
+        "disjunkt": disjoint,
+        "gering": low,
+    }
+    header = (
+        f"{'Szenario':<11} {'Zeilen':>7} {'difflib s':>10} {'ohne Junk s':>12} {'line_diff s':>12} {'Faktor':>7} "
+        f"{'+/- difflib':>12} {'+/- ohne Junk':>14} {'+/- line_diff':>14}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name in args.scenario or SCENARIOS:
+        old, new = scenarios[name]()
+        if apply_opcodes(old, new) != new:
+            raise SystemExit(f"{name}: line_diff rekonstruiert die neue Fassung nicht korrekt")
+        difflib_time, difflib_out = timed(lambda: "".join(difflib.unified_diff(old, new, "alt", "neu")), args.repeat)
+        exact_time, exact_out = timed(lambda: difflib_without_junk(old, new), args.repeat)
+        ours_time, ours_out = timed(lambda: "".join(unified_diff(old, new, "alt", "neu")), args.repeat)
+        print(
+            f"{name:<11} {len(old):>7} {difflib_time:>10.3f} {exact_time:>12.3f} {ours_time:>12.3f} "
+            f"{difflib_time / ours_time:>6.1f}x {count_changes(difflib_out):>12} {count_changes(exact_out):>14} "
+            f"{count_changes(ours_out):>14}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
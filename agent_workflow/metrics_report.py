@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from services.metrics import percentile, read_records
+
+BASE_DIR = Path(__file__).resolve().parent
+LOG_DIR = BASE_DIR / "logs"
+CONFIG_PATH = BASE_DIR / "config" / "agents.yaml"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Auswertung der *.metrics.jsonl aus Agentenläufen")
+    parser.add_argument("--logs", default=str(LOG_DIR), help="Ordner mit Logs (Standard: agent_workflow/logs)")
+    parser.add_argument("--since", help="Nur Aufrufe und Läufe ab diesem Zeitpunkt (ISO, z. B. 2025-12-01)")
+    return parser.parse_args()
+
+
+def load_pricing(config_path: Path) -> dict[str, dict[str, float]]:
+    """Optional `pricing:` section in agents.yaml: model -> {input, output} per 1M tokens."""
+    if not config_path.exists():
+        return {}
+    data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    pricing = data.get("pricing") or {}
+    return {str(model): prices for model, prices in pricing.items() if isinstance(prices, dict)}
+
+
+def call_cost(call: dict[str, Any], pricing: dict[str, dict[str, float]]) -> float | None:
+    prices = pricing.get(call.get("model") or "")
+    if not prices:
+        return None
+    return (
+        call.get("input_tokens", 0) * float(prices.get("input", 0))
+        + call.get("output_tokens", 0) * float(prices.get("output", 0))
+    ) / 1_000_000
+
+
+def summarize(records: list[dict[str, Any]], pricing: dict[str, dict[str, float]]) -> list[str]:
+    calls = [record for record in records if record.get("event") == "call"]
+    runs = [record for record in records if record.get("event") == "run"]
+    lines = [f"{len(calls)} Aufrufe aus {len(runs)} Läufen", ""]
+
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    for call in calls:
+        groups[(call.get("model") or "-", call.get("role") or "-")].append(call)
+    header = f"{'Modell':<16} {'Rolle':<8} {'n':>4} {'Cache':>5} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} {'Input':>9} {'Output':>9} {'Reason.':>9} {'Kosten':>8}"
+    lines.append(header)
+    lines.append("-" * len(header))
+    total_cost = 0.0
+    for (model, role), group in sorted(groups.items()):
+        live = [call for call in group if not call.get("cached") and call.get("status") not in ("error", "retry")]
+        latencies = [float(call.get("wall_seconds", 0)) for call in live]
+        costs = [call_cost(call, pricing) for call in live]
+        known = [cost for cost in costs if cost is not None]
+        total_cost += sum(known)
+        cost_text = f"{sum(known):8.2f}" if known else f"{'-':>8}"
+        lines.append(
+            f"{model:<16} {role:<8} {len(group):>4} {sum(1 for call in group if call.get('cached')):>5} "
+            f"{percentile(latencies, 50):7.1f} {percentile(latencies, 90):7.1f} {percentile(latencies, 99):7.1f} "
+            f"{sum(call.get('input_tokens', 0) for call in group):>9} "
+            f"{sum(call.get('output_tokens', 0) for call in group):>9} "
+            f"{sum(call.get('reasoning_tokens', 0) for call in group):>9} {cost_text}"
+        )
+    errors = sum(1 for call in calls if call.get("status") == "error")
+    retries = sum(1 for call in calls if call.get("status") == "retry")
+    lines.append("")
+    if pricing:
+        lines.append(f"Kosten gesamt: {total_cost:.2f} (laut pricing in agents.yaml)")
+    if errors:
+        lines.append(f"Fehlgeschlagene Aufrufe: {errors}")
+    if retries:
+        lines.append(f"Wiederholte Versuche: {retries}")
+
+    if runs:
+        ok_rounds = [int(run.get("rounds", 0)) for run in runs if run.get("status") == "OK"]
+        durations = [float(run.get("wall_seconds", 0)) for run in runs]
+        lines.append(
+            f"Läufe mit STATUS OK: {len(ok_rounds)}/{len(runs)}"
+            + (f", Runden bis OK: p50 {percentile(ok_rounds, 50):.0f}, max {max(ok_rounds)}" if ok_rounds else "")
+        )
+        lines.append(
+            f"Laufzeit je Kapitel: p50 {percentile(durations, 50):.0f} s, p90 {percentile(durations, 90):.0f} s"
+        )
+    return lines
+
+
+def main() -> int:
+    args = parse_args()
+    log_dir = Path(args.logs).resolve()
+    paths = sorted(log_dir.rglob("*.metrics.jsonl"))
+    if not paths:
+        print(f"Keine *.metrics.jsonl in {log_dir} gefunden.")
+        return 1
+    records = read_records(paths)
+    if args.since:
+        # Aeltere Laufzeilen ohne Zeitstempel fallen mit heraus, ihr Zeitpunkt ist unbekannt.
+        records = [record for record in records if str(record.get("timestamp", "")) >= args.since]
+    print("\n".join(summarize(records, load_pricing(CONFIG_PATH))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
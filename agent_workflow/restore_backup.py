@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from run_agents import CONFIG_PATH, PROJECT_ROOT, load_backup_store, resolve_chapter_path
+from services.document_service import DocumentService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Kapitel-Backups aus agent_workflow/backups anzeigen und zurückspielen")
+    parser.add_argument("chapter", nargs="?", help="Pfad oder Name des Kapitels (ohne Angabe: alle auflisten)")
+    parser.add_argument("--docs-catalog", help="Optionales docs.yaml zur Namensauflösung")
+    parser.add_argument(
+        "--restore",
+        nargs="?",
+        const="-1",
+        metavar="VERSION",
+        help="Version zurückspielen: Nummer aus der Liste (negativ = von hinten, Standard -1) oder Hash-Präfix",
+    )
+    parser.add_argument("--prune", action="store_true", help="Aufbewahrungsgrenze anwenden und verwaiste Objekte löschen")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    store = load_backup_store(CONFIG_PATH)
+    if args.prune:
+        print(f"{store.prune()} Objekte entfernt.")
+    if not args.chapter:
+        chapters: dict[str, int] = {}
+        for entry in store.read_index():
+            chapters[entry.chapter] = chapters.get(entry.chapter, 0) + 1
+        for chapter, count in sorted(chapters.items()):
+            print(f"{count:>3}  {chapter}")
+        return 0
+
+    catalog = Path(args.docs_catalog).resolve() if args.docs_catalog else PROJECT_ROOT / "docs.yaml"
+    chapter_path = resolve_chapter_path(args.chapter, catalog)
+    versions = store.versions(chapter_path)
+    if not versions:
+        print(f"Keine Backups für {chapter_path}.")
+        return 1
+    if args.restore is None:
+        for number, entry in enumerate(versions, start=1):
+            print(f"{number:>3}  {entry.describe()}")
+        return 0
+
+    value = args.restore
+    if value.lstrip("-").isdigit():
+        number = int(value)
+        index = number - 1 if number > 0 else number
+        if not -len(versions) <= index < len(versions):
+            raise SystemExit(f"Version {value} gibt es nicht (1–{len(versions)}).")
+        entry = versions[index]
+    else:
+        matches = [entry for entry in versions if entry.digest.startswith(value)]
+        if len(matches) != 1:
+            raise SystemExit(f"Hash-Präfix {value} passt auf {len(matches)} Versionen.")
+        entry = matches[0]
+
+    with DocumentService(chapter_path, backup_store=store) as doc_service:
+        # Aktuellen Stand vorher sichern, damit auch das Zurückspielen umkehrbar bleibt.
+        doc_service.backup()
+        doc_service.write(store.read(entry))
+    print(f"{chapter_path} auf {entry.describe()} zurückgesetzt.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,16 +2,25 @@
 
 import argparse
 import asyncio
+import contextlib
 import datetime as dt
 import os
-from dataclasses import dataclass
+import sys
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
-from agents import Agent, Runner, trace
-from agents.model_settings import ModelSettings
-from openai.types.shared import Reasoning
+
+try:  # pragma: no cover - only needed for remote models
+    from agents import Agent, Runner, trace
+    from agents.model_settings import ModelSettings
+    from openai.types.responses import ResponseTextDeltaEvent
+    from openai.types.shared import Reasoning
+except ImportError:  # pragma: no cover - local:* models run without the SDK
+    Agent = Runner = ModelSettings = ResponseTextDeltaEvent = Reasoning = None
+    trace = None
 
 try:  # pragma: no cover - optional convenience
     from dotenv import load_dotenv
@@ -21,14 +30,24 @@ except ImportError:  # pragma: no cover - optional convenience
 if load_dotenv is not None:
     load_dotenv()
 
+from services.atomic_io import atomic_write_text
+from services.backup_store import DEFAULT_KEEP, BackupStore
+from services.checkpoint import RunCheckpoint, find_latest_checkpoint
 from services.document_service import DocumentService
+from services.local_model import LocalAgent, is_local_model
+from services.metrics import CallRecord, MetricsLog, usage_from_result
+from services.prompt_assembly import PromptAssembler, load_context
+from services.response_cache import ResponseCache
+from services.retry import RetryPolicy, is_transient
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
 CONFIG_PATH = BASE_DIR / "config" / "agents.yaml"
 LOG_DIR = BASE_DIR / "logs"
 CONFIG_DIR = BASE_DIR / "run_agents"
+CACHE_DIR = BASE_DIR / "cache" / "responses"
 USED_MARKER_PREFIX = "# used:"
+DEFAULT_CONCURRENCY = 4
 
 
 @dataclass
@@ -39,8 +58,18 @@ class AgentSpec:
     instructions: str
     reasoning_effort: str | None = None
     verbosity: str | None = None
-
-    def build(self) -> Agent:
+    local_options: dict[str, Any] = field(default_factory=dict)
+
+    def cache_key(self, prompt: str) -> str:
+        return ResponseCache.make_key(self.model, self.instructions, self.reasoning_effort, self.verbosity, prompt)
+
+    def build(self) -> Agent | LocalAgent:
+        if is_local_model(self.model):
+            return LocalAgent.from_spec(self.name, self.key, self.model, self.local_options, CONFIG_PATH.parent)
+        if Agent is None:
+            raise SystemExit(
+                f"Paket openai-agents fehlt für Modell {self.model} (pip install openai-agents oder model: local:scripted)."
+            )
         reasoning_obj = None
         if self.reasoning_effort:
             reasoning_obj = Reasoning(effort=self.reasoning_effort)
@@ -54,6 +83,49 @@ class AgentSpec:
         )
 
 
+class ModelRateLimiter:
+    """Spaces requests per model so that at most `rpm` calls start per minute."""
+
+    def __init__(self, limits: dict[str, float] | None = None, default_rpm: float | None = None) -> None:
+        self.limits = dict(limits or {})
+        self.default_rpm = default_rpm
+        self._next_slot: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def interval(self, model: str) -> float:
+        rpm = self.limits.get(model, self.default_rpm)
+        return 60.0 / rpm if rpm else 0.0
+
+    async def acquire(self, model: str | None) -> None:
+        key = model or "default"
+        interval = self.interval(key)
+        if interval <= 0:
+            return
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def load_rate_limits(config_path: Path) -> dict[str, float]:
+    config_data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    limits = config_data.get("rate_limits") or {}
+    return {str(model): float(rpm) for model, rpm in limits.items() if rpm}
+
+
+def load_backup_store(config_path: Path, fsync: bool = False) -> BackupStore:
+    config_data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    settings = config_data.get("backups") or {}
+    return BackupStore(
+        keep=int(settings.get("keep", DEFAULT_KEEP)),
+        compression=str(settings.get("compression", "gzip")),
+        fsync=fsync,
+    )
+
+
 def load_agent_specs(config_path: Path) -> dict[str, AgentSpec]:
     config_data = yaml.safe_load(config_path.read_text(encoding="utf-8"))
     agents_section = config_data.get("agents", {})
@@ -73,6 +145,7 @@ def load_agent_specs(config_path: Path) -> dict[str, AgentSpec]:
             instructions=instructions,
             reasoning_effort=reasoning_effort,
             verbosity=verbosity,
+            local_options=data.get("local") or {},
         )
     return specs
 
@@ -85,6 +158,73 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-rounds", type=int, help="Maximale Runden pro Lauf")
     parser.add_argument("--log", help="Eigener Log-Pfad (Standard: agent_workflow/logs/<timestamp>.md)")
     parser.add_argument("--config", help="Pfad zu einer Run-Konfiguration in one_agents/")
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="CONFIG",
+        help="Mehrere Run-Konfigurationen parallel abarbeiten (ohne Angabe: alle unbenutzten)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximal gleichzeitig laufende Kapitel im Batch (Standard: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Anfragen pro Minute je Modell, sofern rate_limits in agents.yaml nichts festlegt",
+    )
+    parser.add_argument(
+        "--delta-prompts",
+        action="store_true",
+        help="Ab Runde 2 nur letzter Entwurf bzw. Vorschlag + Diff zum vorigen Entwurf statt des ganzen Kapitels",
+    )
+    parser.add_argument(
+        "--full-prompts",
+        action="store_true",
+        help="Jede Runde mit vollständigem Kapitel (Standard; überstimmt prompt_mode: delta)",
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        help="Token-Budget für Nachbarkapitel als Kontext (context: in der Run-Konfiguration, sonst vorheriges/nächstes Kapitel)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Expertenantwort beim Entstehen ausgeben (Konsole bzw. <log>.stream.md im Batch)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Im Batch Experten- und Kritikeraufrufe getrennt begrenzen, damit Kapitel sich überlappen",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RetryPolicy.retries,
+        help=f"Wiederholungen bei Netz-/Rate-Limit-/5xx-Fehlern mit exponentiellem Backoff (Standard: {RetryPolicy.retries})",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="CHECKPOINT",
+        help="Unterbrochenen Lauf nach der letzten abgeschlossenen Runde fortsetzen (Log- oder Checkpoint-Pfad, ohne Angabe: der jüngste)",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Kapitel, Backups und Logs vor dem Umbenennen auf die Platte zwingen (langsamer, absturzsicher)",
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument("--no-cache", action="store_true", help="Antwort-Cache weder lesen noch schreiben")
+    cache_group.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Antworten neu abfragen und den Cache damit überschreiben",
+    )
     return parser.parse_args()
 
 
@@ -110,34 +250,6 @@ def resolve_chapter_path(chapter_value: str, catalog_path: Path | None) -> Path:
     return (PROJECT_ROOT / chapter_value).resolve()
 
 
-def build_expert_prompt(goal: str, chapter_content: str, revision_notes: str) -> str:
-    revision_section = revision_notes.strip() or "Keine bisherigen Rückmeldungen."
-    chapter_section = chapter_content.strip() or "Noch kein vorhandener Text."
-    return (
-        f"## Ziel\n{goal}\n\n"
-        f"## Aktueller Dokumentenstand\n{chapter_section}\n\n"
-        f"## Rückmeldungen aus vorigen Runden\n{revision_section}\n\n"
-        "Erstelle eine vollständige, strukturierte Markdown-Fassung in fachlich sauberem Deutsch."
-    )
-
-
-def build_critic_prompt(
-    goal: str,
-    chapter_content: str,
-    expert_output: str,
-    previous_revision: str,
-) -> str:
-    previous_section = previous_revision.strip() or "Keine offenen Punkte."
-    chapter_section = chapter_content.strip() or "Noch kein vorhandener Text."
-    return (
-        f"## Ziel\n{goal}\n\n"
-        f"## Aktueller Dokumentenstand\n{chapter_section}\n\n"
-        f"## Vorschlag des Experten\n{expert_output}\n\n"
-        f"## Bisherige Hinweise\n{previous_section}\n\n"
-        "Prüfe den Text kritisch, formuliere eine finale Version und entscheide mit STATUS-Zeile."
-    )
-
-
 def extract_status(response: str) -> tuple[str, str]:
     lines = response.rstrip().splitlines()
     while lines and not lines[-1].strip():
@@ -152,7 +264,7 @@ def extract_status(response: str) -> tuple[str, str]:
     return status, body
 
 
-def build_log(conversation: list[dict[str, Any]], diff: str, log_meta: dict[str, str]) -> str:
+def build_log(conversation: list[dict[str, Any]], diff: str, log_meta: dict[str, str], words: str = "") -> str:
     lines: list[str] = [f"# Agentenlauf {log_meta['timestamp']}"]
     for key, value in log_meta.items():
         if key == "timestamp":
@@ -171,12 +283,23 @@ def build_log(conversation: list[dict[str, Any]], diff: str, log_meta: dict[str,
         lines.append("`````")
         if entry.get("status"):
             lines.append(f"STATUS erkannt: {entry['status']}")
+        if entry.get("tokens"):
+            lines.append(f"Prompt-Tokens: {entry['tokens']}")
+        if entry.get("cached"):
+            lines.append("Antwort aus dem Cache.")
     if diff:
         lines.append("")
         lines.append("## Diff")
         lines.append("`````diff")
         lines.append(diff)
         lines.append("`````")
+    if words:
+        lines.append("")
+        lines.append("## Änderungen auf Wortebene")
+        lines.append("`[-entfernt-]`, `{+neu+}`; `~` markiert eine geänderte Zeile.")
+        lines.append("`````text")
+        lines.append(words)
+        lines.append("`````")
     return "\n".join(lines)
 
 
@@ -268,69 +391,375 @@ def mark_config_used(path: Path, timestamp: str) -> None:
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
-async def run_workflow() -> None:
-    args = parse_args()
-    if args.config:
-        config_path = Path(args.config).resolve()
-        if not config_path.exists():
-            raise SystemExit(f"Konfigurationsdatei {config_path} existiert nicht.")
-    else:
-        config_path = choose_config_interactively()
+@dataclass
+class RunJob:
+    config_path: Path | None
+    chapter_path: Path
+    goal: str
+    max_rounds: int
+    log_path: Path
+    timestamp: str
+    delta_prompts: bool = False
+    context_paths: list[Path] = field(default_factory=list)
+    context_budget: int = 0
 
-    config_data = load_run_config(config_path) if config_path else {}
 
-    chapter_value = resolve_runtime_value(args.chapter, config_data, "chapter")
+@dataclass
+class RunContext:
+    expert_spec: AgentSpec
+    critic_spec: AgentSpec
+    limiter: ModelRateLimiter
+    cache: ResponseCache
+    stream: bool = False
+    echo_stream: bool = True
+    role_slots: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    backups: BackupStore = field(default_factory=BackupStore)
+    fsync: bool = False
+    expert_agent: Agent | LocalAgent = field(init=False)
+    critic_agent: Agent | LocalAgent = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.expert_agent = self.expert_spec.build()
+        self.critic_agent = self.critic_spec.build()
+
+
+def make_timestamp() -> str:
+    return dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+
+
+def resolve_job(args: argparse.Namespace, config_path: Path | None, batch: bool = False) -> RunJob:
+    config_data = load_run_config(config_path) if config_path else {}
+    # Im Batch gelten Kapitel, Ziel und Log nur aus der jeweiligen Konfiguration.
+    chapter_value = resolve_runtime_value(None if batch else args.chapter, config_data, "chapter")
     if not chapter_value:
         raise SystemExit("Kein Kapitel angegeben (CLI --chapter oder run_agents.yaml).")
-    goal_value = resolve_runtime_value(args.goal, config_data, "goal")
+    goal_value = resolve_runtime_value(None if batch else args.goal, config_data, "goal")
     docs_catalog_value = resolve_runtime_value(args.docs_catalog, config_data, "docs_catalog")
     max_rounds_value = resolve_runtime_value(args.max_rounds, config_data, "max_rounds", 3)
-    log_value = resolve_runtime_value(args.log, config_data, "log")
+    log_value = resolve_runtime_value(None if batch else args.log, config_data, "log")
 
     max_rounds = ensure_max_rounds(int(max_rounds_value))
     catalog_path = Path(docs_catalog_value).resolve() if docs_catalog_value else None
     chapter_path = resolve_chapter_path(chapter_value, catalog_path)
     goal = goal_value or chapter_path.stem.replace("_", " ")
 
+    timestamp = make_timestamp()
+    if batch and not log_value and config_path:
+        # Gleichzeitig gestartete Laeufe haben denselben Zeitstempel.
+        log_value = str(LOG_DIR / f"{timestamp}-{config_path.stem}.md")
+    log_path = determine_log_path(log_value, timestamp)
+    delta_prompts = not args.full_prompts and (args.delta_prompts or config_data.get("prompt_mode", "full") == "delta")
+    context_budget = int(resolve_runtime_value(args.context_budget, config_data, "context_budget", 0) or 0)
+    context_paths = resolve_context_paths(config_data.get("context"), chapter_path, catalog_path, context_budget)
+    return RunJob(
+        config_path,
+        chapter_path,
+        goal,
+        max_rounds,
+        log_path,
+        timestamp,
+        delta_prompts=delta_prompts,
+        context_paths=context_paths,
+        context_budget=context_budget,
+    )
+
+
+def resolve_context_paths(
+    context_value: Any, chapter_path: Path, catalog_path: Path | None, budget: int
+) -> list[Path]:
+    if not budget:
+        return []
+    if isinstance(context_value, str):
+        context_value = [context_value]
+    if context_value:
+        return [resolve_chapter_path(str(value), catalog_path) for value in context_value]
+    # Ohne Angabe: direkt vorheriges und nächstes Kapitel im selben Ordner.
+    siblings = sorted(chapter_path.parent.glob("*.md"), key=lambda p: p.name.lower())
+    if chapter_path not in siblings:
+        return []
+    position = siblings.index(chapter_path)
+    return [siblings[i] for i in (position - 1, position + 1) if 0 <= i < len(siblings)]
+
+
+class StreamSink:
+    """Writes streamed text deltas to `<log>.stream.md` and optionally to the console."""
+
+    def __init__(self, path: Path, echo: bool) -> None:
+        self.path = path
+        self.echo = echo
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = self.path.open("a", encoding="utf-8", newline="\n")
+
+    def start(self, title: str) -> None:
+        self.write(f"\n\n## {title}\n\n")
+
+    def write(self, text: str) -> None:
+        self.handle.write(text)
+        self.handle.flush()
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    def close(self) -> None:
+        if self.echo:
+            sys.stdout.write("\n")
+        self.handle.close()
+
+    def __enter__(self) -> "StreamSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def build_run_context(args: argparse.Namespace, batch: bool = False) -> RunContext:
     specs = load_agent_specs(CONFIG_PATH)
     try:
-        expert_agent = specs["expert"].build()
-        critic_agent = specs["critic"].build()
+        expert_spec = specs["expert"]
+        critic_spec = specs["critic"]
     except KeyError as exc:
         raise SystemExit(f"Fehlende Agentendefinition: {exc}") from exc
+    limiter = ModelRateLimiter(load_rate_limits(CONFIG_PATH), default_rpm=args.rpm)
+    cache = ResponseCache(
+        CACHE_DIR,
+        read_enabled=not (args.no_cache or args.refresh_cache),
+        write_enabled=not args.no_cache,
+    )
+    role_slots: dict[str, asyncio.Semaphore] = {}
+    if batch and args.pipeline:
+        role_slots = {spec.key: asyncio.Semaphore(args.concurrency) for spec in (expert_spec, critic_spec)}
+    return RunContext(
+        expert_spec,
+        critic_spec,
+        limiter,
+        cache,
+        stream=args.stream,
+        echo_stream=not batch,
+        role_slots=role_slots,
+        retry=RetryPolicy(retries=args.retries),
+        backups=load_backup_store(CONFIG_PATH, fsync=args.fsync),
+        fsync=args.fsync,
+    )
 
-    timestamp = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    log_path = determine_log_path(log_value, timestamp)
 
+def loop_trace(name: str):
+    return trace(name) if trace is not None else contextlib.nullcontext()
+
+
+async def call_model(ctx: RunContext, spec: AgentSpec, agent: Agent | LocalAgent, prompt: str, sink: StreamSink | None):
+    slot = ctx.role_slots.get(spec.key)
+    if slot is not None:
+        async with slot:
+            return await call_model_unlimited(agent, prompt, sink)
+    return await call_model_unlimited(agent, prompt, sink)
+
+
+async def call_model_unlimited(agent: Agent | LocalAgent, prompt: str, sink: StreamSink | None):
+    if isinstance(agent, LocalAgent):
+        return await agent.run(prompt, sink.write if sink is not None else None)
+    if sink is None:
+        return await Runner.run(agent, prompt)
+    result = Runner.run_streamed(agent, prompt)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            sink.write(event.data.delta)
+    return result
+
+
+async def run_agent(
+    ctx: RunContext,
+    spec: AgentSpec,
+    agent: Agent | LocalAgent,
+    prompt: str,
+    metrics: MetricsLog,
+    round_index: int,
+    sink: StreamSink | None = None,
+) -> tuple[str, CallRecord]:
+    """Returns the agent's answer and its call metrics (not yet written, the caller adds the status).
+
+    Transient errors are retried with exponential backoff and jitter; each failed
+    attempt is written to the metrics log right away with status `retry`, the
+    last one with status `error`.
+    """
+    record = CallRecord(role=spec.key, model=spec.model, round=round_index)
+    start = time.perf_counter()
+    key = spec.cache_key(prompt)
+    cached = ctx.cache.get(key)
+    if cached is not None:
+        record.cached = True
+        record.wall_seconds = time.perf_counter() - start
+        if sink is not None:
+            sink.write(cached)
+        return cached, record
+    for attempt in range(1, ctx.retry.attempts + 1):
+        await ctx.limiter.acquire(spec.model)
+        record.wait_seconds = time.perf_counter() - start
+        try:
+            result = await call_model(ctx, spec, agent, prompt, sink)
+            break
+        except Exception as exc:
+            record.wall_seconds = time.perf_counter() - start - record.wait_seconds
+            if attempt == ctx.retry.attempts or not is_transient(exc):
+                record.status = "error"
+                metrics.record_call(record)
+                raise
+            record.status = "retry"
+            metrics.record_call(record)
+            delay = ctx.retry.delay(attempt)
+            print(
+                f"[{spec.name}] {type(exc).__name__}: {exc} – Versuch {attempt + 1}/{ctx.retry.attempts} "
+                f"in {delay:.1f} s"
+            )
+            if sink is not None:
+                sink.write(f"\n\n[Abgebrochen: {type(exc).__name__}, neuer Versuch]\n\n")
+            await asyncio.sleep(delay)
+            record = CallRecord(role=spec.key, model=spec.model, round=round_index)
+            start = time.perf_counter()
+    record.wall_seconds = time.perf_counter() - start - record.wait_seconds
+    record.apply_usage(usage_from_result(result))
+    output = str(result.final_output).strip()
+    ctx.cache.put(key, output, model=spec.model)
+    return output, record
+
+
+def describe_cache_usage(conversation: list[dict[str, Any]], cache: ResponseCache) -> str:
+    if not cache.read_enabled and not cache.write_enabled:
+        return "deaktiviert"
+    hits = sum(1 for entry in conversation if entry.get("cached"))
+    mode = "" if cache.read_enabled else " (refresh)"
+    return f"{hits} Treffer, {len(conversation) - hits} Fehlgriffe{mode}"
+
+
+def job_to_dict(job: RunJob) -> dict[str, Any]:
+    return {
+        "config_path": str(job.config_path) if job.config_path else None,
+        "chapter_path": str(job.chapter_path),
+        "goal": job.goal,
+        "max_rounds": job.max_rounds,
+        "log_path": str(job.log_path),
+        "timestamp": job.timestamp,
+        "delta_prompts": job.delta_prompts,
+        "context_paths": [str(path) for path in job.context_paths],
+        "context_budget": job.context_budget,
+    }
+
+
+def job_from_dict(data: dict[str, Any]) -> RunJob:
+    return RunJob(
+        Path(data["config_path"]) if data.get("config_path") else None,
+        Path(data["chapter_path"]),
+        data["goal"],
+        int(data["max_rounds"]),
+        Path(data["log_path"]),
+        data["timestamp"],
+        delta_prompts=bool(data.get("delta_prompts", False)),
+        context_paths=[Path(path) for path in data.get("context_paths", [])],
+        context_budget=int(data.get("context_budget", 0)),
+    )
+
+
+def resolve_checkpoint(value: str) -> Path:
+    if value == "latest":
+        path = find_latest_checkpoint(LOG_DIR)
+        if path is None:
+            raise SystemExit(f"Kein unterbrochener Lauf (*.checkpoint.json) in {LOG_DIR}.")
+        return path
+    path = Path(value).resolve()
+    if path.suffix == ".md":
+        path = RunCheckpoint.path_for(path)
+    if not path.exists():
+        raise SystemExit(f"Checkpoint {path} existiert nicht.")
+    return path
+
+
+async def run_chapter(job: RunJob, ctx: RunContext, checkpoint: RunCheckpoint | None = None) -> str:
+    """Runs the expert/critic loop for one chapter, writes its log and returns the final status.
+
+    State is checkpointed after every round; passing that checkpoint back in
+    continues after its last completed round.
+    """
     conversation: list[dict[str, Any]] = []
     final_status = "STATUS: RUECKFRAGE_FUER_NUTZER"
     diff_text = ""
+    word_diff_text = ""
     final_content: str | None = None
     revision_notes = ""
-
-    doc_service = DocumentService(chapter_path)
-    with trace("Dokumentations-Loop"):
-        with doc_service:
-            original_content = doc_service.load()
-            doc_service.backup(original_content)
-
-            for round_index in range(1, max_rounds + 1):
-                expert_prompt = build_expert_prompt(goal, original_content, revision_notes)
-                expert_result = await Runner.run(expert_agent, expert_prompt)
-                expert_output = str(expert_result.final_output).strip()
+    chapter_path = job.chapter_path
+    goal = job.goal
+
+    doc_service = DocumentService(chapter_path, backup_store=ctx.backups, fsync=ctx.fsync)
+    metrics = MetricsLog(MetricsLog.sidecar_for(job.log_path), chapter=str(chapter_path))
+    checkpoint_path = RunCheckpoint.path_for(job.log_path)
+    run_start = time.perf_counter()
+    rounds_done = 0
+    first_round = 1
+    context = load_context(job.context_paths, job.context_budget, ctx.expert_spec.model)
+    assembler: PromptAssembler | None = None
+    previous_draft: str | None = None
+    sink = StreamSink(job.log_path.with_suffix(".stream.md"), ctx.echo_stream) if ctx.stream else None
+    # Der Sink wird auch bei Abbruch oder Fehler geschlossen.
+    with loop_trace("Dokumentations-Loop"), sink if sink is not None else contextlib.nullcontext():
+        async with doc_service:
+            if checkpoint is None:
+                original_content = doc_service.load()
+                doc_service.backup(original_content)
+                checkpoint = RunCheckpoint(job_to_dict(job), original_content)
+            else:
+                original_content = checkpoint.original_content
+                doc_service.backup(original_content)
+                if checkpoint.final_status is None and doc_service.load() != original_content:
+                    raise SystemExit(f"{chapter_path} wurde seit dem Checkpoint geändert; Fortsetzen abgebrochen.")
+                conversation = list(checkpoint.conversation)
+                revision_notes = checkpoint.revision_notes
+                previous_draft = checkpoint.previous_draft
+                rounds_done = checkpoint.completed_round
+                first_round = checkpoint.completed_round + 1
+                diff_text = checkpoint.diff_text
+                word_diff_text = checkpoint.word_diff_text
+                final_status = checkpoint.final_status or final_status
+                print(f"[{chapter_path.name}] Fortsetzen nach Runde {checkpoint.completed_round}.")
+            assembler = PromptAssembler(
+                goal,
+                original_content,
+                chapter_label=str(chapter_path),
+                context=context,
+                delta=job.delta_prompts,
+                model=ctx.expert_spec.model,
+                token_counts=list(checkpoint.token_counts),
+            )
+
+            last_round = first_round - 1 if checkpoint.final_status else job.max_rounds
+            for round_index in range(first_round, last_round + 1):
+                rounds_done = round_index
+                expert_prompt = assembler.expert(round_index, revision_notes, previous_draft)
+                expert_tokens = assembler.last_tokens
+                if sink is not None:
+                    sink.start(f"Runde {round_index} – Experte ({chapter_path.name})")
+                expert_output, expert_call = await run_agent(
+                    ctx, ctx.expert_spec, ctx.expert_agent, expert_prompt, metrics, round_index, sink
+                )
+                metrics.record_call(expert_call)
                 conversation.append(
                     {
                         "round": round_index,
                         "role": "Experte",
                         "prompt": expert_prompt,
                         "response": expert_output,
+                        "cached": expert_call.cached,
+                        "tokens": expert_tokens,
                     }
                 )
 
-                critic_prompt = build_critic_prompt(goal, original_content, expert_output, revision_notes)
-                critic_result = await Runner.run(critic_agent, critic_prompt)
-                critic_output = str(critic_result.final_output).strip()
+                critic_prompt = assembler.critic(round_index, expert_output, revision_notes, previous_draft)
+                previous_draft = expert_output
+                critic_tokens = assembler.last_tokens
+                critic_output, critic_call = await run_agent(
+                    ctx, ctx.critic_spec, ctx.critic_agent, critic_prompt, metrics, round_index
+                )
                 status, critic_body = extract_status(critic_output)
+                critic_call.status = status
+                metrics.record_call(critic_call)
                 conversation.append(
                     {
                         "round": round_index,
@@ -338,6 +767,8 @@ async def run_workflow() -> None:
                         "prompt": critic_prompt,
                         "response": critic_output,
                         "status": status,
+                        "cached": critic_call.cached,
+                        "tokens": critic_tokens,
                     }
                 )
 
@@ -350,30 +781,162 @@ async def run_workflow() -> None:
                         fromfile=str(chapter_path),
                         tofile=str(chapter_path),
                     )
+                    word_diff_text = DocumentService.make_word_diff(original_content, final_content)
                     final_status = "STATUS: OK"
-                    break
-
-                revision_notes = critic_body or "Bitte alle Punkte präzisieren."
-                if round_index == max_rounds:
-                    final_status = "STATUS: RUECKFRAGE_FUER_NUTZER"
+                else:
+                    revision_notes = critic_body or "Bitte alle Punkte präzisieren."
+                    if round_index == job.max_rounds:
+                        final_status = "STATUS: RUECKFRAGE_FUER_NUTZER"
+
+                checkpoint.completed_round = round_index
+                checkpoint.conversation = conversation
+                checkpoint.revision_notes = revision_notes
+                checkpoint.previous_draft = previous_draft
+                checkpoint.token_counts = assembler.token_counts
+                if status == "OK" or round_index == job.max_rounds:
+                    checkpoint.final_status = final_status
+                    checkpoint.diff_text = diff_text
+                    checkpoint.word_diff_text = word_diff_text
+                checkpoint.save(checkpoint_path, fsync=ctx.fsync)
+                if status == "OK":
                     break
 
     log_meta = {
-        "timestamp": timestamp,
+        "timestamp": job.timestamp,
         "kapitel": str(chapter_path),
         "ziel": goal,
         "status": final_status,
-        "backup": str(doc_service.backup_path),
+        "backup": doc_service.describe_backup(),
+        "cache": describe_cache_usage(conversation, ctx.cache),
+        "prompt_tokens": assembler.summary() if assembler else "0",
+        "metrics": str(metrics.path),
     }
-    log_content = build_log(conversation, diff_text, log_meta)
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    log_path.write_text(log_content, encoding="utf-8", newline="\n")
+    if first_round > 1:
+        log_meta["fortgesetzt"] = f"nach Runde {first_round - 1}"
+    metrics.record_run(final_status.removeprefix("STATUS: "), rounds_done, time.perf_counter() - run_start)
+    log_content = build_log(conversation, diff_text, log_meta, word_diff_text)
+    atomic_write_text(job.log_path, log_content, fsync=ctx.fsync)
+    checkpoint_path.unlink(missing_ok=True)
+
+    if job.config_path:
+        mark_config_used(job.config_path, job.timestamp)
+    return final_status
+
+
+def select_batch_configs(values: list[str]) -> list[Path]:
+    if values:
+        paths = [Path(value).resolve() for value in values]
+        missing = [path for path in paths if not path.exists()]
+        if missing:
+            raise SystemExit(f"Konfigurationsdatei {missing[0]} existiert nicht.")
+        return paths
+    return [path for path in list_config_files() if not config_is_used(path)]
+
+
+def dedupe_jobs(jobs: list[RunJob]) -> list[RunJob]:
+    # Ein Kapitel ist waehrend eines Laufs gesperrt; doppelte Eintraege wuerden nacheinander laufen
+    # und sich gegenseitig ueberschreiben.
+    seen: set[Path] = set()
+    unique: list[RunJob] = []
+    for job in jobs:
+        if job.chapter_path in seen:
+            print(f"Übersprungen (Kapitel bereits im Batch): {job.config_path}")
+            continue
+        seen.add(job.chapter_path)
+        unique.append(job)
+    return unique
+
+
+async def run_batch(args: argparse.Namespace) -> None:
+    if args.concurrency < 1:
+        raise SystemExit("--concurrency muss mindestens 1 sein")
+    configs = select_batch_configs(args.batch)
+    if not configs:
+        print(f"Keine unbenutzten Konfigurationen in {CONFIG_DIR}.")
+        return
+    jobs = dedupe_jobs([resolve_job(args, path, batch=True) for path in configs])
+    ctx = build_run_context(args, batch=True)
+    # Im Pipeline-Modus begrenzen die Rollen-Slots die Modellaufrufe; doppelt so viele Kapitel
+    # duerfen offen sein, damit der naechste Experte schon laeuft, waehrend ein Kritiker prueft.
+    chapter_slots = args.concurrency * 2 if args.pipeline else args.concurrency
+    semaphore = asyncio.Semaphore(chapter_slots)
+    mode = f" (Pipeline: Experte und Kritiker je bis zu {args.concurrency} gleichzeitig)" if args.pipeline else ""
+    print(f"Starte {len(jobs)} Kapitel mit bis zu {args.concurrency} parallelen Läufen{mode}.")
+
+    async def run_limited(job: RunJob) -> str:
+        async with semaphore:
+            start = time.perf_counter()
+            status = await run_chapter_reporting(job, ctx)
+            print(f"[{job.chapter_path.name}] {status} in {time.perf_counter() - start:.0f} s → {job.log_path}")
+            return status
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_limited(job) for job in jobs), return_exceptions=True)
+    failures = 0
+    print("")
+    print("Zusammenfassung:")
+    for job, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            failures += 1
+            print(f"  {job.config_path.name}: FEHLER {result}")
+        else:
+            print(f"  {job.config_path.name}: {result}")
+    print(f"{len(jobs) - failures}/{len(jobs)} Läufe abgeschlossen in {time.perf_counter() - started:.0f} s.")
+    print(f"Antwort-Cache: {ctx.cache.stats.summary()}")
+    print(summarize_env_hint())
+
+
+async def run_chapter_reporting(job: RunJob, ctx: RunContext, checkpoint: RunCheckpoint | None = None) -> str:
+    try:
+        return await run_chapter(job, ctx, checkpoint)
+    except Exception:
+        checkpoint_path = RunCheckpoint.path_for(job.log_path)
+        if checkpoint_path.exists():
+            print(f"Lauf abgebrochen; fortsetzen mit: --resume {checkpoint_path}")
+        raise
+
+
+async def resume_workflow(args: argparse.Namespace) -> None:
+    checkpoint_path = resolve_checkpoint(args.resume)
+    checkpoint = RunCheckpoint.load(checkpoint_path)
+    job = job_from_dict(checkpoint.job)
+    ctx = build_run_context(args)
+    final_status = await run_chapter_reporting(job, ctx, checkpoint)
+
+    print(f"Log gespeichert unter: {job.log_path}")
+    print(f"Finaler Status: {final_status}")
+    print(f"Antwort-Cache: {ctx.cache.stats.summary()}")
+    print(summarize_env_hint())
+
+
+async def run_workflow() -> None:
+    args = parse_args()
+    if args.retries < 0:
+        raise SystemExit("--retries darf nicht negativ sein")
+    if args.resume is not None:
+        if args.batch is not None:
+            raise SystemExit("--resume setzt einen einzelnen Lauf fort und ist mit --batch nicht kombinierbar.")
+        await resume_workflow(args)
+        return
+    if args.batch is not None:
+        await run_batch(args)
+        return
+    if args.config:
+        config_path = Path(args.config).resolve()
+        if not config_path.exists():
+            raise SystemExit(f"Konfigurationsdatei {config_path} existiert nicht.")
+    else:
+        config_path = choose_config_interactively()
 
-    if config_path:
-        mark_config_used(config_path, timestamp)
+    if args.pipeline:
+        print("Hinweis: --pipeline wirkt nur zusammen mit --batch.")
+    job = resolve_job(args, config_path)
+    ctx = build_run_context(args)
+    final_status = await run_chapter_reporting(job, ctx)
 
-    print(f"Log gespeichert unter: {log_path}")
+    print(f"Log gespeichert unter: {job.log_path}")
     print(f"Finaler Status: {final_status}")
+    print(f"Antwort-Cache: {ctx.cache.stats.summary()}")
     print(summarize_env_hint())
 
 
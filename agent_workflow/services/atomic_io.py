@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+
+class FsyncBatch:
+    """Collects directories whose entries changed and fsyncs each of them once in `flush()`."""
+
+    def __init__(self) -> None:
+        self.directories: set[Path] = set()
+
+    def add(self, directory: Path) -> None:
+        self.directories.add(directory)
+
+    def flush(self) -> None:
+        for directory in sorted(self.directories):
+            fsync_directory(directory)
+        self.directories.clear()
+
+    def __enter__(self) -> "FsyncBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+
+def fsync_directory(directory: Path) -> None:
+    if os.name == "nt":  # pragma: no cover - directories cannot be opened on Windows
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = False, batch: FsyncBatch | None = None) -> None:
+    """Writes via a hidden temp file in the target folder and `os.replace`.
+
+    Readers (e.g. the livereload watcher) see either the old or the new file,
+    never a truncated one. With `fsync` the data is flushed before the rename
+    and the directory entry afterwards, or later by `batch` if one is given.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            if fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.chmod(tmp_name, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    if fsync:
+        if batch is not None:
+            batch.add(path.parent)
+        else:
+            fsync_directory(path.parent)
+
+
+def atomic_write_text(path: Path, text: str, fsync: bool = False, batch: FsyncBatch | None = None) -> None:
+    """UTF-8 with `\\n` line endings, like the rest of the agent workflow."""
+    atomic_write_bytes(path, text.encode("utf-8"), fsync=fsync, batch=batch)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from services.atomic_io import FsyncBatch, atomic_write_bytes, atomic_write_text
+from services.file_lock import FileLock
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_BACKUP_DIR = Path(__file__).resolve().parents[1] / "backups"
+DEFAULT_KEEP = 20
+CODEC_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ".txt"}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return data
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Backup ist zstd-komprimiert; bitte `pip install zstandard`.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+@dataclass
+class BackupEntry:
+    chapter: str
+    digest: str
+    codec: str
+    size: int
+    created: float
+
+    def describe(self) -> str:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return f"{self.digest[:12]} ({stamp}, {self.size} Bytes)"
+
+
+@dataclass
+class BackupStore:
+    """Content-addressed, deduplicated chapter backups outside the docs tree.
+
+    Objects live in `objects/<aa>/<sha256>.<codec>`; `index.jsonl` lists the
+    versions per chapter in order. Identical content is stored once, and
+    only the newest `keep` versions per chapter are retained.
+    """
+
+    root: Path = DEFAULT_BACKUP_DIR
+    keep: int = DEFAULT_KEEP
+    compression: str = "gzip"
+    fsync: bool = False
+
+    def __post_init__(self) -> None:
+        self.root = self.root.resolve()
+        if self.compression not in CODEC_SUFFIXES:
+            raise ValueError(f"Unbekannte Kompression {self.compression} (erlaubt: {', '.join(CODEC_SUFFIXES)})")
+        if self.compression == "zstd" and zstandard is None:
+            self.compression = "gzip"
+        self.index_path = self.root / "index.jsonl"
+        self.objects_dir = self.root / "objects"
+
+    def _lock(self) -> FileLock:
+        return FileLock(self.root / "index.jsonl.lock", timeout=30.0)
+
+    def object_path(self, digest: str, codec: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}{CODEC_SUFFIXES[codec]}"
+
+    def _find_object(self, digest: str) -> tuple[Path, str] | None:
+        for codec in CODEC_SUFFIXES:
+            path = self.object_path(digest, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def read_index(self) -> list[BackupEntry]:
+        if not self.index_path.exists():
+            return []
+        entries = []
+        for line in self.index_path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(BackupEntry(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        return entries
+
+    def versions(self, chapter: Path | str) -> list[BackupEntry]:
+        """Oldest first."""
+        key = str(chapter)
+        return [entry for entry in self.read_index() if entry.chapter == key]
+
+    def put(self, chapter: Path | str, content: str) -> BackupEntry:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Objekt und Index unter derselben Sperre, sonst koennte ein paralleles prune() das noch
+        # unreferenzierte Objekt loeschen.
+        with FsyncBatch() as batch, self._lock():
+            found = self._find_object(digest)
+            codec = found[1] if found else self.compression
+            if found is None:
+                atomic_write_bytes(self.object_path(digest, codec), compress(data, codec), self.fsync, batch)
+            versions = self.versions(chapter)
+            if versions and versions[-1].digest == digest:
+                return versions[-1]
+            entry = BackupEntry(str(chapter), digest, codec, len(data), time.time())
+            with self.index_path.open("a", encoding="utf-8", newline="\n") as handle:
+                handle.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+                if self.fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            if len(versions) + 1 > self.keep:
+                self._prune_locked(batch)
+            elif self.fsync:
+                batch.add(self.root)
+        return entry
+
+    def read(self, entry: BackupEntry) -> str:
+        return decompress(self.object_path(entry.digest, entry.codec).read_bytes(), entry.codec).decode("utf-8")
+
+    def prune(self) -> int:
+        """Applies the retention limit and deletes unreferenced objects; returns the number removed."""
+        if not self.root.exists():
+            return 0
+        with FsyncBatch() as batch, self._lock():
+            return self._prune_locked(batch)
+
+    def _prune_locked(self, batch: FsyncBatch) -> int:
+        entries = self.read_index()
+        per_chapter: dict[str, list[BackupEntry]] = {}
+        for entry in entries:
+            per_chapter.setdefault(entry.chapter, []).append(entry)
+        kept = {id(entry) for versions in per_chapter.values() for entry in versions[-self.keep :]}
+        remaining = [entry for entry in entries if id(entry) in kept]
+        atomic_write_text(
+            self.index_path,
+            "".join(json.dumps(asdict(entry), ensure_ascii=False) + "\n" for entry in remaining),
+            self.fsync,
+            batch,
+        )
+        referenced = {self.object_path(entry.digest, entry.codec) for entry in remaining}
+        removed = 0
+        for path in self.objects_dir.glob("*/*"):
+            if path.is_file() and path not in referenced and not path.name.endswith(".tmp"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
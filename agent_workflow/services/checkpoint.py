@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from services.atomic_io import atomic_write_text
+
+
+@dataclass
+class RunCheckpoint:
+    """Loop state of one chapter run after its last completed round.
+
+    Written next to the log as `<log>.checkpoint.json` after every round and
+    removed once the final log exists, so a leftover file always marks an
+    interrupted run that `--resume` can continue.
+    """
+
+    job: dict[str, Any]
+    original_content: str
+    completed_round: int = 0
+    conversation: list[dict[str, Any]] = field(default_factory=list)
+    revision_notes: str = ""
+    previous_draft: str | None = None
+    token_counts: list[dict[str, Any]] = field(default_factory=list)
+    final_status: str | None = None
+    diff_text: str = ""
+    word_diff_text: str = ""
+    updated: str = ""
+
+    @staticmethod
+    def path_for(log_path: Path) -> Path:
+        return log_path.with_suffix(".checkpoint.json")
+
+    def save(self, path: Path, fsync: bool = False) -> None:
+        self.updated = dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        atomic_write_text(path, json.dumps(asdict(self), ensure_ascii=False, indent=2), fsync=fsync)
+
+    @classmethod
+    def load(cls, path: Path) -> "RunCheckpoint":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(**data)
+
+
+def find_latest_checkpoint(log_dir: Path) -> Path | None:
+    candidates = [path for path in log_dir.rglob("*.checkpoint.json") if path.is_file()]
+    return max(candidates, key=lambda path: path.stat().st_mtime) if candidates else None
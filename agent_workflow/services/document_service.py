@@ -1,10 +1,12 @@
 ﻿from __future__ import annotations
 
-import time
-from dataclasses import dataclass
-from difflib import unified_diff
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+
+from services.atomic_io import atomic_write_text
+from services.backup_store import BackupEntry, BackupStore
+from services.file_lock import STALE_LOCK_SECONDS, FileLock
+from services.line_diff import unified_diff_text, word_diff
 
 
 @dataclass
@@ -12,53 +14,63 @@ class DocumentService:
     """Utility to read, lock, back up, and write chapter files in UTF-8."""
 
     chapter_path: Path
-    lock_timeout: float = 10.0
+    lock_timeout: float | None = 10.0
     poll_interval: float = 0.5
+    stale_after: float = STALE_LOCK_SECONDS
+    backup_store: BackupStore = field(default_factory=BackupStore)
+    fsync: bool = False
 
     def __post_init__(self) -> None:
         self.chapter_path = self.chapter_path.resolve()
         self.chapter_path.parent.mkdir(parents=True, exist_ok=True)
         self.lock_path = self.chapter_path.with_suffix(self.chapter_path.suffix + ".lock")
-        self.backup_path = self.chapter_path.with_suffix(self.chapter_path.suffix + ".bak")
-        self._lock_acquired = False
+        self.last_backup: BackupEntry | None = None
+        self._lock = FileLock(
+            self.lock_path,
+            timeout=self.lock_timeout,
+            poll_interval=self.poll_interval,
+            stale_after=self.stale_after,
+        )
 
     def acquire_lock(self) -> None:
-        """Create a simple lock file to avoid concurrent sessions."""
-        start = time.time()
-        while self.lock_path.exists():
-            if time.time() - start > self.lock_timeout:
-                raise TimeoutError(f"Could not acquire lock for {self.chapter_path}")
-            time.sleep(self.poll_interval)
-        self.lock_path.write_text("locked", encoding="utf-8", newline="\n")
-        self._lock_acquired = True
+        """Lock the chapter against concurrent sessions (see FileLock for the backends)."""
+        self._lock.acquire()
+
+    async def acquire_lock_async(self) -> None:
+        await self._lock.acquire_async()
 
     def release_lock(self) -> None:
-        if self._lock_acquired and self.lock_path.exists():
-            self.lock_path.unlink()
-        self._lock_acquired = False
+        self._lock.release()
 
     def load(self) -> str:
         if not self.chapter_path.exists():
             return ""
         return self.chapter_path.read_text(encoding="utf-8")
 
-    def backup(self, content: str | None = None) -> None:
+    def backup(self, content: str | None = None) -> BackupEntry:
+        """Store the current content in the shared backup store (deduplicated, retention-limited)."""
         if content is None:
             content = self.load()
-        self.backup_path.write_text(content, encoding="utf-8", newline="\n")
+        self.last_backup = self.backup_store.put(self.chapter_path, content)
+        return self.last_backup
+
+    def describe_backup(self) -> str:
+        if self.last_backup is None:
+            return "-"
+        return f"{self.last_backup.describe()} in {self.backup_store.root}"
 
     def write(self, new_content: str) -> None:
-        self.chapter_path.write_text(new_content, encoding="utf-8", newline="\n")
+        """Atomic replace, so watchers never see a half-written chapter."""
+        atomic_write_text(self.chapter_path, new_content, fsync=self.fsync)
 
     @staticmethod
     def make_diff(old: str, new: str, fromfile: str, tofile: str) -> str:
-        diff_iter: Iterable[str] = unified_diff(
-            old.splitlines(keepends=True),
-            new.splitlines(keepends=True),
-            fromfile=fromfile,
-            tofile=tofile,
-        )
-        return "".join(diff_iter)
+        """Unified diff via patience/Myers on interned lines (services/line_diff.py)."""
+        return unified_diff_text(old, new, fromfile, tofile)
+
+    @staticmethod
+    def make_word_diff(old: str, new: str) -> str:
+        return word_diff(old, new)
 
     def __enter__(self) -> "DocumentService":
         self.acquire_lock()
@@ -66,3 +78,10 @@ class DocumentService:
 
     def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
         self.release_lock()
+
+    async def __aenter__(self) -> "DocumentService":
+        await self.acquire_lock_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release_lock()
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+try:  # pragma: no cover - POSIX only
+    import fcntl
+except ImportError:  # pragma: no cover - Windows falls back to O_CREAT|O_EXCL lock files
+    fcntl = None
+
+STALE_LOCK_SECONDS = 6 * 3600
+
+
+@dataclass
+class LockOwner:
+    pid: int
+    host: str
+    acquired: float
+
+    @classmethod
+    def current(cls) -> "LockOwner":
+        return cls(os.getpid(), socket.gethostname(), time.time())
+
+    def describe(self) -> str:
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.acquired))
+        return f"PID {self.pid} on {self.host} since {since}"
+
+
+def read_owner(path: Path) -> LockOwner | None:
+    try:
+        return parse_owner(path.read_bytes())
+    except OSError:
+        return None
+
+
+def parse_owner(data: bytes) -> LockOwner | None:
+    try:
+        record = json.loads(data.decode("utf-8"))
+        return LockOwner(int(record["pid"]), str(record["host"]), float(record["acquired"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def lock_snapshot(path: Path) -> tuple[bytes, int, int] | None:
+    """Content plus inode and mtime, enough to tell one lock file from its successor."""
+    try:
+        with path.open("rb") as handle:
+            info = os.fstat(handle.fileno())
+            return handle.read(), info.st_ino, info.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def pid_alive(pid: int) -> bool | None:
+    """None when liveness cannot be checked safely (on Windows os.kill would terminate the process)."""
+    if os.name == "nt":
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _same_file(fd: int, path: Path) -> bool:
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(fd)
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+class FileLock:
+    """Inter-process lock on a `.lock` file next to the protected file.
+
+    On POSIX the lock is an `fcntl.flock` on the file: waiting blocks in the
+    kernel instead of polling, and a crashed holder releases the lock with
+    its last file descriptor, so stale locks cannot occur. Elsewhere the lock
+    file is created with `O_CREAT|O_EXCL`; a leftover file counts as stale
+    once its owner process is gone or it is older than `stale_after`.
+    In both cases the file records PID, host and acquisition time.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeout: float | None = 10.0,
+        poll_interval: float = 0.5,
+        stale_after: float = STALE_LOCK_SECONDS,
+    ) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._fd: int | None = None
+        self._owned = False
+
+    @property
+    def locked(self) -> bool:
+        return self._owned
+
+    def owner(self) -> LockOwner | None:
+        return read_owner(self.path)
+
+    def _deadline(self) -> float | None:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def _timeout_error(self) -> TimeoutError:
+        owner = self.owner()
+        holder = f" (held by {owner.describe()})" if owner else ""
+        return TimeoutError(f"Could not acquire lock {self.path}{holder}")
+
+    def _write_owner(self, fd: int) -> None:
+        payload = json.dumps(asdict(LockOwner.current())).encode("utf-8")
+        os.ftruncate(fd, 0)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, payload)
+
+    def acquire(self) -> None:
+        if self._owned:
+            raise RuntimeError(f"Lock {self.path} is already held by this instance")
+        if fcntl is not None:
+            self._acquire_flock(self._deadline())
+        else:
+            self._acquire_exclusive(self._deadline())
+        self._owned = True
+
+    def release(self) -> None:
+        if not self._owned:
+            return
+        self._owned = False
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                # Erst loeschen, dann freigeben: Wartende pruefen nach dem flock, ob ihre Datei noch gilt.
+                if _same_file(fd, self.path):
+                    self.path.unlink()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            return
+        owner = self.owner()
+        if owner is None or (owner.pid == os.getpid() and owner.host == socket.gethostname()):
+            self.path.unlink(missing_ok=True)
+
+    # POSIX: flock
+
+    def _acquire_flock(self, deadline: float | None) -> None:
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if not self._flock(fd, deadline):
+                    raise self._timeout_error()
+                if not _same_file(fd, self.path):
+                    # Der Vorgaenger hat die Datei beim Freigeben geloescht; neu oeffnen.
+                    os.close(fd)
+                    continue
+                self._write_owner(fd)
+            except BaseException:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+                raise
+            self._fd = fd
+            return
+
+    @staticmethod
+    def _flock(fd: int, deadline: float | None) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+        if deadline is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        # flock selbst kennt kein Timeout: der blockierende Aufruf laeuft in einem Hilfsthread auf
+        # einem dup() des Deskriptors. Gibt der Aufrufer auf, schliesst der Thread sein dup nach
+        # dem Erwerb und gibt die Sperre damit sofort wieder frei.
+        waiter_fd = os.dup(fd)
+        guard = threading.Lock()
+        state: dict[str, object] = {}
+        finished = threading.Event()
+
+        def wait() -> None:
+            try:
+                fcntl.flock(waiter_fd, fcntl.LOCK_EX)
+            except OSError as exc:
+                state["error"] = exc
+            with guard:
+                state["done"] = True
+                abandoned = state.get("abandoned", False)
+            if abandoned:
+                os.close(waiter_fd)
+            finished.set()
+
+        threading.Thread(target=wait, name=f"flock-wait-{fd}", daemon=True).start()
+        finished.wait(remaining)
+        with guard:
+            if not state.get("done"):
+                state["abandoned"] = True
+                return False
+        os.close(waiter_fd)
+        if "error" in state:
+            raise state["error"]  # type: ignore[misc]
+        return True
+
+    # Fallback: O_CREAT|O_EXCL
+
+    def _acquire_exclusive(self, deadline: float | None) -> None:
+        delay = min(0.05, self.poll_interval)
+        while True:
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if self._break_stale():
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise self._timeout_error()
+                time.sleep(delay if remaining is None else min(delay, remaining))
+                delay = min(delay * 2, self.poll_interval)
+                continue
+            try:
+                self._write_owner(fd)
+            finally:
+                os.close(fd)
+            return
+
+    def _is_stale(self, snapshot: tuple[bytes, int, int]) -> bool:
+        data, _, mtime_ns = snapshot
+        owner = parse_owner(data)
+        if owner is not None and owner.host == socket.gethostname():
+            alive = pid_alive(owner.pid)
+            if alive is not None:
+                return not alive
+        age = time.time() - (owner.acquired if owner else mtime_ns / 1e9)
+        return age > self.stale_after
+
+    def _break_stale(self) -> bool:
+        snapshot = lock_snapshot(self.path)
+        if snapshot is None:
+            return True
+        if not self._is_stale(snapshot):
+            return False
+        # Pruefen und Umbenennen sind nicht atomar: Zwischendurch kann ein anderer Wartender die
+        # verwaiste Datei weggeraeumt und eine frische angelegt haben. Deshalb die verschobene Datei
+        # mit dem geprueften Stand vergleichen und eine fremde, lebende Sperre zurueckstellen.
+        grave = self.path.with_name(f"{self.path.name}.stale-{os.getpid()}-{threading.get_ident()}")
+        try:
+            os.replace(self.path, grave)
+        except FileNotFoundError:
+            return True
+        moved = lock_snapshot(grave)
+        if moved is not None and moved != snapshot:
+            self._restore(grave, moved[0])
+        grave.unlink(missing_ok=True)
+        return True
+
+    def _restore(self, grave: Path, data: bytes) -> None:
+        """Puts a live lock file back without overwriting a lock created in the meantime."""
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    # Context managers
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    async def acquire_async(self) -> None:
+        """Waits in a worker thread so the event loop keeps serving other chapters."""
+        task = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(lambda done: self.release() if not done.cancelled() and not done.exception() else None)
+            raise
+
+    async def __aenter__(self) -> "FileLock":
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import math
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterator, Sequence
+
+Opcode = tuple[str, int, int, int, int]
+MAX_ANCHOR_OCCURRENCES = 8
+# Wie xdiff: Myers sucht hoechstens bis zu dieser Editierdistanz, danach wird der Rest ein replace-Block.
+MIN_COST_LIMIT = 256
+# Gesamtbudget an Suchschritten je Eingabezeile, damit viele mittelgrosse Bereiche nicht quadratisch summieren.
+STEPS_PER_LINE = 2
+WORD_PATTERN = re.compile(r"\w+|\s+|[^\w\s]", re.UNICODE)
+
+
+def intern_lines(a: Sequence[str], b: Sequence[str]) -> tuple[list[int], list[int]]:
+    """Maps every distinct line to a small int so comparisons are integer compares."""
+    table: dict[str, int] = {}
+    return [table.setdefault(line, len(table)) for line in a], [table.setdefault(line, len(table)) for line in b]
+
+
+def _anchors(a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int) -> list[tuple[int, int]]:
+    """Anchor pairs for patience diff, reduced to their longest increasing run.
+
+    Prefers lines occurring exactly once on both sides. Regions without such
+    lines (tables, reference lists) fall back to the rarest lines that occur
+    equally often on both sides, paired in order, as histogram diff does.
+    """
+    positions_a: dict[int, list[int]] = {}
+    for i in range(alo, ahi):
+        positions_a.setdefault(a[i], []).append(i)
+    positions_b: dict[int, list[int]] = {}
+    for j in range(blo, bhi):
+        line = b[j]
+        if line in positions_a:
+            positions_b.setdefault(line, []).append(j)
+    rarest = MAX_ANCHOR_OCCURRENCES + 1
+    for line, js in positions_b.items():
+        count = len(js)
+        if count < rarest and len(positions_a[line]) == count:
+            rarest = count
+            if count == 1:
+                break
+    if rarest > MAX_ANCHOR_OCCURRENCES:
+        return []
+    pairs = sorted(
+        pair
+        for line, js in positions_b.items()
+        if len(js) == rarest and len(positions_a[line]) == rarest
+        for pair in zip(positions_a[line], js)
+    )
+    if not pairs:
+        return []
+    # Patience sorting: laengste in b aufsteigende Folge der eindeutigen Paare.
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        slot = bisect_left(tails, j)
+        if slot == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[slot] = j
+            tail_index[slot] = index
+        previous[index] = tail_index[slot - 1] if slot else -1
+    anchors = []
+    index = tail_index[-1]
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def cost_limit(n: int, m: int) -> int:
+    return max(MIN_COST_LIMIT, 2 * math.isqrt(n + m))
+
+
+def _middle_snake(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int, limit: int, budget: list[int]
+) -> tuple[int, int, int, int] | None:
+    """Myers' linear-space middle snake; returns (x, y, u, v) in absolute indices.
+
+    None once the search passes `limit` steps in each direction or the shared
+    `budget` of diagonal steps runs out (too different to be worth a minimal diff).
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = min((n + m + 1) // 2, limit)
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(max_d + 1):
+        budget[0] -= 2 * d + 2
+        if budget[0] < 0:
+            return None
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            budget[0] -= x - x0
+            c = delta - k
+            if odd and -(d - 1) <= c <= d - 1 and x + backward[offset + c] >= n:
+                return alo + x0, blo + y0, alo + x, blo + y
+        for c in range(-d, d + 1, 2):
+            if c == -d or (c != d and backward[offset + c - 1] < backward[offset + c + 1]):
+                x = backward[offset + c + 1]
+            else:
+                x = backward[offset + c - 1] + 1
+            y = x - c
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + c] = x
+            budget[0] -= x - x0
+            k = delta - c
+            if not odd and -d <= k <= d and x + forward[offset + k] >= n:
+                return ahi - x, bhi - y, ahi - x0, bhi - y0
+    return None
+
+
+def _myers(
+    a: list[int],
+    alo: int,
+    ahi: int,
+    b: list[int],
+    blo: int,
+    bhi: int,
+    out: list[tuple[int, int, int]],
+    limit: int,
+    budget: list[int],
+) -> None:
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        out.append((start, blo - (alo - start), alo - start))
+    tail = 0
+    while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        tail += 1
+    if alo < ahi and blo < bhi:
+        snake = _middle_snake(a, alo, ahi, b, blo, bhi, limit, budget)
+        if snake is not None:
+            x, y, u, v = snake
+            _myers(a, alo, x, b, blo, y, out, limit, budget)
+            if u > x:
+                out.append((x, y, u - x))
+            _myers(a, u, ahi, b, v, bhi, out, limit, budget)
+    if tail:
+        out.append((ahi, bhi, tail))
+
+
+def _myers_reduced(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int, out: list[tuple[int, int, int]], budget: list[int]
+) -> None:
+    """Myers on the lines that occur on both sides only, as xdiff does.
+
+    Lines without a partner can never be part of a match, so dropping them keeps
+    the diff minimal; rewritten or unrelated versions shrink to (almost) nothing.
+    """
+    in_b = set(b[blo:bhi])
+    kept_a = [i for i in range(alo, ahi) if a[i] in in_b]
+    in_a = {a[i] for i in kept_a}
+    kept_b = [j for j in range(blo, bhi) if b[j] in in_a]
+    if not kept_a or not kept_b:
+        return
+    reduced_a = [a[i] for i in kept_a]
+    reduced_b = [b[j] for j in kept_b]
+    blocks: list[tuple[int, int, int]] = []
+    _myers(reduced_a, 0, len(reduced_a), reduced_b, 0, len(reduced_b), blocks, cost_limit(ahi - alo, bhi - blo), budget)
+    # Zurueck auf Originalindizes; benachbarte Einzelpaare fasst matching_blocks wieder zusammen.
+    for i, j, size in blocks:
+        out.extend((kept_a[i + offset], kept_b[j + offset], 1) for offset in range(size))
+
+
+def _patience(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int, out: list[tuple[int, int, int]], budget: list[int]
+) -> None:
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        out.append((start, blo - (alo - start), alo - start))
+    tail = 0
+    while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        tail += 1
+    if alo < ahi and blo < bhi:
+        anchors = _anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            i, j = alo, blo
+            for anchor_i, anchor_j in anchors:
+                _patience(a, i, anchor_i, b, j, anchor_j, out, budget)
+                out.append((anchor_i, anchor_j, 1))
+                i, j = anchor_i + 1, anchor_j + 1
+            _patience(a, i, ahi, b, j, bhi, out, budget)
+        else:
+            # Keine brauchbaren Anker (z. B. nur haeufige Zeilen): Myers auf dem Rest.
+            _myers_reduced(a, alo, ahi, b, blo, bhi, out, budget)
+    if tail:
+        out.append((ahi, bhi, tail))
+
+
+def matching_blocks(a: Sequence[str], b: Sequence[str]) -> list[tuple[int, int, int]]:
+    """Like `SequenceMatcher.get_matching_blocks()` (incl. the final dummy block), via patience + Myers."""
+    ia, ib = intern_lines(a, b)
+    raw: list[tuple[int, int, int]] = []
+    budget = [STEPS_PER_LINE * (len(ia) + len(ib)) + MIN_COST_LIMIT * MIN_COST_LIMIT // 4]
+    _patience(ia, 0, len(ia), ib, 0, len(ib), raw, budget)
+    merged: list[tuple[int, int, int]] = []
+    for i, j, size in raw:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    merged.append((len(a), len(b), 0))
+    return merged
+
+
+def opcodes(a: Sequence[str], b: Sequence[str]) -> list[Opcode]:
+    """Same shape as `SequenceMatcher.get_opcodes()`."""
+    result: list[Opcode] = []
+    i = j = 0
+    for ai, bj, size in matching_blocks(a, b):
+        tag = ""
+        if i < ai and j < bj:
+            tag = "replace"
+        elif i < ai:
+            tag = "delete"
+        elif j < bj:
+            tag = "insert"
+        if tag:
+            result.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            result.append(("equal", ai, i, bj, j))
+    return result
+
+
+def grouped_opcodes(codes: list[Opcode], n: int = 3) -> Iterator[list[Opcode]]:
+    """Hunks with `n` lines of context, as in `SequenceMatcher.get_grouped_opcodes()`."""
+    codes = list(codes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > n * 2:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def unified_diff(a: Sequence[str], b: Sequence[str], fromfile: str = "", tofile: str = "", n: int = 3) -> Iterator[str]:
+    """Drop-in for `difflib.unified_diff` on lines with line endings."""
+    started = False
+    for group in grouped_opcodes(opcodes(a, b), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+
+
+@lru_cache(maxsize=32)
+def unified_diff_text(old: str, new: str, fromfile: str, tofile: str, n: int = 3) -> str:
+    """Cached, since the same pair is diffed for prompts and again for the log."""
+    return "".join(unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True), fromfile, tofile, n))
+
+
+def highlight_words(old_line: str, new_line: str) -> str:
+    """One line with `[-removed-]` and `{+added+}` word spans (git --word-diff style)."""
+    old_words = WORD_PATTERN.findall(old_line)
+    new_words = WORD_PATTERN.findall(new_line)
+    parts = []
+    for tag, i1, i2, j1, j2 in opcodes(old_words, new_words):
+        if tag == "equal":
+            parts.append("".join(old_words[i1:i2]))
+            continue
+        if tag in ("replace", "delete"):
+            parts.append(f"[-{''.join(old_words[i1:i2])}-]")
+        if tag in ("replace", "insert"):
+            parts.append(f"{{+{''.join(new_words[j1:j2])}+}}")
+    return "".join(parts)
+
+
+def word_diff(old: str, new: str, n: int = 0) -> str:
+    """Changed lines with intra-line highlighting; replaced blocks are paired line by line."""
+    a = old.splitlines()
+    b = new.splitlines()
+    lines: list[str] = []
+    for group in grouped_opcodes(opcodes(a, b), n):
+        first, last = group[0], group[-1]
+        lines.append(f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend(f" {line}" for line in a[i1:i2])
+                continue
+            paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+            for offset in range(paired):
+                lines.append(f"~{highlight_words(a[i1 + offset], b[j1 + offset])}")
+            lines.extend(f"-[-{line}-]" for line in a[i1 + paired : i2])
+            lines.extend(f"+{{+{line}+}}" for line in b[j1 + paired : j2])
+    return "\n".join(lines)
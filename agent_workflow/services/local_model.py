@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from services.prompt_assembly import (
+    CHAPTER_SECTION,
+    DRAFT_SECTION,
+    GOAL_SECTION,
+    PROPOSAL_SECTION,
+    SECTION_TITLES,
+    count_tokens,
+)
+
+LOCAL_PREFIX = "local:"
+BACKENDS = ("scripted", "replay")
+STREAM_CHUNK_CHARS = 80
+FILLER_SENTENCE = "Die Anlage wird gemäß Herstellerangaben geprüft und das Ergebnis im Protokoll festgehalten."
+LOG_ENTRY_PATTERN = re.compile(
+    r"^## Runde \d+ – (?P<role>\S+)\n.*?^### Antwort\n`````markdown\n(?P<response>.*?)\n`````$",
+    re.M | re.S,
+)
+ROLE_LABELS = {"expert": "Experte", "critic": "Kritiker"}
+
+
+def is_local_model(model: str | None) -> bool:
+    return bool(model) and str(model).startswith(LOCAL_PREFIX)
+
+
+def prompt_section(prompt: str, title: str) -> str:
+    # Kapiteltexte enthalten selbst `##`-Ueberschriften; ein Abschnitt endet daher erst am
+    # naechsten Abschnittstitel aus prompt_assembly.
+    others = "|".join(re.escape(other) for other in SECTION_TITLES if other != title)
+    pattern = rf"^## {re.escape(title)}\n(.*?)(?=^## (?:{others})\n|\Z)"
+    match = re.search(pattern, prompt, re.M | re.S)
+    return match.group(1).strip() if match else ""
+
+
+def filler_text(seed: str, chars: int) -> str:
+    """Deterministic padding text of roughly `chars` characters."""
+    if chars <= 0:
+        return ""
+    digest = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:8]
+    lines = []
+    size = 0
+    index = 0
+    while size < chars:
+        line = f"- Schritt {index + 1} ({digest}): {FILLER_SENTENCE}"
+        lines.append(line)
+        size += len(line) + 1
+        index += 1
+    return "\n".join(lines)
+
+
+def load_replay_responses(path: Path, role: str) -> list[str]:
+    """Reads the answers of one role from a Markdown log (or all `*.md` logs in a folder)."""
+    paths = sorted(path.glob("*.md")) if path.is_dir() else [path]
+    label = ROLE_LABELS.get(role, role)
+    responses = []
+    for log_path in paths:
+        text = log_path.read_text(encoding="utf-8")
+        responses.extend(
+            match.group("response") for match in LOG_ENTRY_PATTERN.finditer(text) if match.group("role") == label
+        )
+    return responses
+
+
+@dataclass
+class LocalResult:
+    """Mimics the parts of an agents SDK run result that run_agents reads."""
+
+    final_output: str
+    context_wrapper: Any
+
+
+@dataclass
+class LocalAgent:
+    """Offline stand-in for an `Agent`, selected via `model: local:scripted` or `model: local:replay`.
+
+    Both backends are deterministic: answers depend only on the prompt and on
+    how often the same goal was seen before, so repeated runs produce
+    identical logs. `latency` (seconds per call) and `response_chars` model
+    the cost of a remote call without any network access; `fail_every` makes
+    every n-th call raise a transient `ConnectionError` to exercise retries.
+    """
+
+    name: str
+    role: str
+    backend: str = "scripted"
+    latency: float = 0.0
+    response_chars: int = 2000
+    ok_after: int = 1
+    fail_every: int = 0
+    replay_path: Path | None = None
+    attempts: int = 0
+    calls: dict[str, int] = field(default_factory=dict)
+    replay: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unbekanntes lokales Modell local:{self.backend} (erlaubt: {', '.join(BACKENDS)})")
+        if self.backend == "replay":
+            if self.replay_path is None:
+                raise ValueError("local:replay braucht local.replay_path in agents.yaml")
+            self.replay = load_replay_responses(self.replay_path, self.role)
+            if not self.replay:
+                raise ValueError(f"Keine Antworten für {self.role} in {self.replay_path}")
+
+    @classmethod
+    def from_spec(cls, name: str, role: str, model: str, options: dict[str, Any], base_dir: Path) -> "LocalAgent":
+        replay_value = options.get("replay_path")
+        return cls(
+            name=name,
+            role=role,
+            backend=model[len(LOCAL_PREFIX):],
+            latency=float(options.get("latency", 0.0)),
+            response_chars=int(options.get("response_chars", 2000)),
+            ok_after=max(1, int(options.get("ok_after", 1))),
+            fail_every=max(0, int(options.get("fail_every", 0))),
+            replay_path=(base_dir / replay_value).resolve() if replay_value else None,
+        )
+
+    def _next_call(self, prompt: str) -> int:
+        # Runden werden je Ziel gezaehlt, damit parallele Kapitel sich nicht beeinflussen.
+        goal = prompt_section(prompt, GOAL_SECTION)
+        count = self.calls.get(goal, 0) + 1
+        self.calls[goal] = count
+        return count
+
+    def respond(self, prompt: str) -> str:
+        call = self._next_call(prompt)
+        if self.backend == "replay":
+            return self.replay[(call - 1) % len(self.replay)]
+        if self.role == "critic":
+            proposal = prompt_section(prompt, PROPOSAL_SECTION)
+            if call >= self.ok_after:
+                return f"{proposal}\n\nSTATUS: OK"
+            return f"- Runde {call}: Abschnitte präzisieren.\n\nSTATUS: REVISION_NEEDED"
+        base = prompt_section(prompt, DRAFT_SECTION) or prompt_section(prompt, CHAPTER_SECTION)
+        base = base[: self.response_chars]
+        return (base + "\n\n" + filler_text(f"{prompt}:{call}", self.response_chars - len(base))).strip()
+
+    async def run(self, prompt: str, on_delta: Callable[[str], None] | None = None) -> LocalResult:
+        self.attempts += 1
+        if self.fail_every and self.attempts % self.fail_every == 0:
+            await asyncio.sleep(self.latency)
+            raise ConnectionError(f"{self.name}: simulierter Verbindungsabbruch (Aufruf {self.attempts})")
+        output = self.respond(prompt)
+        if on_delta is None:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        else:
+            chunks = [output[i : i + STREAM_CHUNK_CHARS] for i in range(0, len(output), STREAM_CHUNK_CHARS)] or [""]
+            for chunk in chunks:
+                await asyncio.sleep(self.latency / len(chunks))
+                on_delta(chunk)
+        input_tokens = count_tokens(prompt)
+        output_tokens = count_tokens(output)
+        usage = SimpleNamespace(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+            output_tokens_details=None,
+        )
+        return LocalResult(output, SimpleNamespace(usage=usage))
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+
+def utc_timestamp() -> str:
+    return dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass
+class CallRecord:
+    """Metrics of one agent call; written as one JSONL line."""
+
+    role: str
+    model: str | None
+    round: int = 0
+    chapter: str = ""
+    status: str = ""
+    cached: bool = False
+    wall_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    total_tokens: int = 0
+    requests: int = 0
+    timestamp: str = field(default_factory=utc_timestamp)
+
+    def apply_usage(self, usage: Any) -> None:
+        """Copies token counts from an agents SDK `Usage` object (missing fields stay 0)."""
+        if usage is None:
+            return
+        self.requests = int(getattr(usage, "requests", 0) or 0)
+        self.input_tokens = int(getattr(usage, "input_tokens", 0) or 0)
+        self.output_tokens = int(getattr(usage, "output_tokens", 0) or 0)
+        self.total_tokens = int(getattr(usage, "total_tokens", 0) or 0) or self.input_tokens + self.output_tokens
+        details = getattr(usage, "output_tokens_details", None)
+        self.reasoning_tokens = int(getattr(details, "reasoning_tokens", 0) or 0)
+
+
+def usage_from_result(result: Any) -> Any:
+    wrapper = getattr(result, "context_wrapper", None)
+    return getattr(wrapper, "usage", None)
+
+
+@dataclass
+class MetricsLog:
+    """Appends call and run records to the JSONL sidecar of a Markdown log."""
+
+    path: Path
+    chapter: str = ""
+
+    def __post_init__(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def sidecar_for(log_path: Path) -> Path:
+        return log_path.with_suffix(".metrics.jsonl")
+
+    def _append(self, payload: dict[str, Any]) -> None:
+        with self.path.open("a", encoding="utf-8", newline="\n") as handle:
+            handle.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+    def record_call(self, record: CallRecord) -> None:
+        record.chapter = record.chapter or self.chapter
+        self._append({"event": "call", **asdict(record)})
+
+    def record_run(self, status: str, rounds: int, wall_seconds: float) -> None:
+        self._append(
+            {
+                "event": "run",
+                "chapter": self.chapter,
+                "status": status,
+                "rounds": rounds,
+                "wall_seconds": round(wall_seconds, 3),
+                "timestamp": utc_timestamp(),
+            }
+        )
+
+
+def read_records(paths: Iterable[Path]) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = []
+    for path in paths:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
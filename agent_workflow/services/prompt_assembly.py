@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from services.document_service import DocumentService
+
+try:  # pragma: no cover - optional dependency
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+TRIM_MARKER = "\n[… gekürzt]"
+
+# Abschnittstitel der Prompts; services/local_model zerlegt Prompts anhand genau dieser Liste.
+GOAL_SECTION = "Ziel"
+CHAPTER_SECTION = "Aktueller Dokumentenstand"
+CONTEXT_SECTION = "Kontext aus Nachbarkapiteln"
+REVISION_SECTION = "Rückmeldungen aus vorigen Runden"
+DRAFT_SECTION = "Dein letzter Entwurf"
+CRITIC_NOTES_SECTION = "Rückmeldungen des Prüfers"
+PROPOSAL_SECTION = "Vorschlag des Experten"
+DRAFT_DIFF_SECTION = "Änderungen gegenüber dem vorigen Entwurf"
+PREVIOUS_NOTES_SECTION = "Bisherige Hinweise"
+SECTION_TITLES = (
+    GOAL_SECTION,
+    CHAPTER_SECTION,
+    CONTEXT_SECTION,
+    REVISION_SECTION,
+    DRAFT_SECTION,
+    CRITIC_NOTES_SECTION,
+    PROPOSAL_SECTION,
+    DRAFT_DIFF_SECTION,
+    PREVIOUS_NOTES_SECTION,
+)
+
+
+def _encoding(model: str | None):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    """Exact count via tiktoken when installed, otherwise a chars/4 estimate."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def token_count_is_estimate() -> bool:
+    return tiktoken is None
+
+
+def trim_to_budget(text: str, budget: int, model: str | None = None) -> str:
+    if budget <= 0:
+        return ""
+    if count_tokens(text, model) <= budget:
+        return text
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[: budget * CHARS_PER_TOKEN].rstrip() + TRIM_MARKER
+    return encoding.decode(encoding.encode(text)[:budget]).rstrip() + TRIM_MARKER
+
+
+def build_expert_prompt(goal: str, chapter_content: str, revision_notes: str, context: str = "") -> str:
+    revision_section = revision_notes.strip() or "Keine bisherigen Rückmeldungen."
+    chapter_section = chapter_content.strip() or "Noch kein vorhandener Text."
+    return (
+        f"## {GOAL_SECTION}\n{goal}\n\n"
+        f"## {CHAPTER_SECTION}\n{chapter_section}\n\n"
+        f"{context_section(context)}"
+        f"## {REVISION_SECTION}\n{revision_section}\n\n"
+        "Erstelle eine vollständige, strukturierte Markdown-Fassung in fachlich sauberem Deutsch."
+    )
+
+
+def build_critic_prompt(
+    goal: str,
+    chapter_content: str,
+    expert_output: str,
+    previous_revision: str,
+    context: str = "",
+) -> str:
+    previous_section = previous_revision.strip() or "Keine offenen Punkte."
+    chapter_section = chapter_content.strip() or "Noch kein vorhandener Text."
+    return (
+        f"## {GOAL_SECTION}\n{goal}\n\n"
+        f"## {CHAPTER_SECTION}\n{chapter_section}\n\n"
+        f"{context_section(context)}"
+        f"## {PROPOSAL_SECTION}\n{expert_output}\n\n"
+        f"## {PREVIOUS_NOTES_SECTION}\n{previous_section}\n\n"
+        "Prüfe den Text kritisch, formuliere eine finale Version und entscheide mit STATUS-Zeile."
+    )
+
+
+def build_expert_delta_prompt(goal: str, previous_draft: str, revision_notes: str) -> str:
+    revision_section = revision_notes.strip() or "Keine bisherigen Rückmeldungen."
+    return (
+        f"## {GOAL_SECTION}\n{goal}\n\n"
+        f"## {DRAFT_SECTION}\n{previous_draft.strip()}\n\n"
+        f"## {CRITIC_NOTES_SECTION}\n{revision_section}\n\n"
+        "Überarbeite den Entwurf anhand der Rückmeldungen und gib wieder die vollständige Markdown-Fassung aus."
+    )
+
+
+def build_critic_delta_prompt(goal: str, expert_output: str, draft_diff: str, previous_revision: str) -> str:
+    previous_section = previous_revision.strip() or "Keine offenen Punkte."
+    return (
+        f"## {GOAL_SECTION}\n{goal}\n\n"
+        f"## {PROPOSAL_SECTION}\n{expert_output}\n\n"
+        f"## {DRAFT_DIFF_SECTION}\n```diff\n{diff_section(draft_diff)}\n```\n\n"
+        f"## {PREVIOUS_NOTES_SECTION}\n{previous_section}\n\n"
+        "Prüfe den Text kritisch, formuliere eine finale Version und entscheide mit STATUS-Zeile."
+    )
+
+
+def context_section(context: str) -> str:
+    return f"## {CONTEXT_SECTION}\n{context.strip()}\n\n" if context.strip() else ""
+
+
+def diff_section(diff: str) -> str:
+    return diff.rstrip() or "(keine Änderungen)"
+
+
+def load_context(paths: list[Path], budget: int, model: str | None = None) -> str:
+    """Concatenates neighbouring chapters, splitting the token budget evenly between them."""
+    existing = [path for path in paths if path.exists()]
+    if not existing or budget <= 0:
+        return ""
+    share = budget // len(existing)
+    blocks = []
+    for path in existing:
+        text = trim_to_budget(path.read_text(encoding="utf-8").strip(), share, model)
+        if text:
+            blocks.append(f"### {path.name}\n{text}")
+    return "\n\n".join(blocks)
+
+
+@dataclass
+class PromptAssembler:
+    """Builds expert/critic prompts: full chapter in round one, optionally deltas afterwards.
+
+    In delta mode the expert gets only its last draft plus the critic's notes,
+    and the critic gets the new proposal plus its diff against the previous
+    round's draft instead of the original chapter. Off by default until the
+    logged token counts show it saves tokens on real chapters.
+    """
+
+    goal: str
+    original_content: str
+    chapter_label: str
+    context: str = ""
+    delta: bool = False
+    model: str | None = None
+    token_counts: list[dict[str, int | str]] = field(default_factory=list)
+
+    def _diff(self, previous_draft: str, draft: str) -> str:
+        return DocumentService.make_diff(
+            previous_draft,
+            draft,
+            fromfile=f"{self.chapter_label} (voriger Entwurf)",
+            tofile=f"{self.chapter_label} (Entwurf)",
+        )
+
+    def _record(self, round_index: int, role: str, prompt: str) -> str:
+        self.token_counts.append({"round": round_index, "role": role, "tokens": count_tokens(prompt, self.model)})
+        return prompt
+
+    def expert(self, round_index: int, revision_notes: str, previous_draft: str | None) -> str:
+        if self.delta and round_index > 1 and previous_draft:
+            prompt = build_expert_delta_prompt(self.goal, previous_draft, revision_notes)
+        else:
+            prompt = build_expert_prompt(self.goal, self.original_content, revision_notes, self.context)
+        return self._record(round_index, "Experte", prompt)
+
+    def critic(self, round_index: int, expert_output: str, previous_revision: str, previous_draft: str | None) -> str:
+        if self.delta and round_index > 1 and previous_draft:
+            diff = self._diff(previous_draft, expert_output)
+            prompt = build_critic_delta_prompt(self.goal, expert_output, diff, previous_revision)
+        else:
+            prompt = build_critic_prompt(
+                self.goal, self.original_content, expert_output, previous_revision, self.context
+            )
+        return self._record(round_index, "Kritiker", prompt)
+
+    @property
+    def last_tokens(self) -> int:
+        return int(self.token_counts[-1]["tokens"]) if self.token_counts else 0
+
+    def summary(self) -> str:
+        rounds: dict[int, int] = {}
+        for entry in self.token_counts:
+            rounds[int(entry["round"])] = rounds.get(int(entry["round"]), 0) + int(entry["tokens"])
+        total = sum(rounds.values())
+        per_round = ", ".join(f"Runde {index}: {tokens}" for index, tokens in sorted(rounds.items()))
+        suffix = " (geschätzt)" if token_count_is_estimate() else ""
+        return f"{total}{suffix} – {per_round}" if per_round else "0"
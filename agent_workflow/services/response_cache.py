@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits} Treffer / {total} Anfragen, {self.stores} gespeichert, {self.evictions} verdrängt"
+
+
+@dataclass
+class ResponseCache:
+    """On-disk cache for agent responses with size-bounded LRU eviction.
+
+    Each entry is one JSON file named after its key; the file mtime doubles as
+    the last-access time, so eviction needs no separate index.
+    """
+
+    cache_dir: Path
+    max_entries: int = 2000
+    max_bytes: int = 200 * 1024 * 1024
+    read_enabled: bool = True
+    write_enabled: bool = True
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self) -> None:
+        self.cache_dir = self.cache_dir.resolve()
+
+    @staticmethod
+    def make_key(
+        model: str | None,
+        instructions: str,
+        reasoning_effort: str | None,
+        verbosity: str | None,
+        prompt: str,
+    ) -> str:
+        parts = [model or "", sha256_text(instructions), reasoning_effort or "", verbosity or "", sha256_text(prompt)]
+        return sha256_text(json.dumps(parts))
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        if not self.read_enabled:
+            self.stats.misses += 1
+            return None
+        path = self._entry_path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stats.misses += 1
+            return None
+        response = data.get("response") if isinstance(data, dict) else None
+        if not isinstance(response, str):
+            # Unvollstaendige Eintraege zaehlen wie kaputte als Fehlschlag.
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return response
+
+    def put(self, key: str, response: str, model: str | None = None) -> None:
+        if not self.write_enabled:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        payload = {"model": model, "created": time.time(), "response": response}
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self.stats.stores += 1
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until both bounds hold."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total_bytes -= size
+            self.stats.evictions += 1
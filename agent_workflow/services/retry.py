@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+# Fehlerklassen aus openai/httpx, die erfahrungsgemaess beim naechsten Versuch durchgehen.
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for network/timeout/rate-limit/5xx errors; anything else fails right away."""
+    if isinstance(exc, (ConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(exc).__mro__):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and status in TRANSIENT_STATUS_CODES
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay, base_delay * 2**(n-1)))."""
+
+    retries: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+
+    @property
+    def attempts(self) -> int:
+        return self.retries + 1
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
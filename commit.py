@@ -1,11 +1,24 @@
 #!/usr/bin/env python3
-"""Werkzeug zum Ausführen vorbereiteter Commits aus dem Ordner `commit/`."""
+"""Werkzeug zum Ausführen vorbereiteter Commits aus dem Ordner `commit/`.
+
+Welche Einträge offen sind, steht im Index `commit/.queue.jsonl` (`--build-index` baut ihn neu).
+Die ausgewählten Einträge werden in einem einzigen `git fast-import`-Lauf committet
+(ohne Hooks und Signatur); `--sequential` nutzt stattdessen `git add` + `git commit` je Eintrag.
+"""
 
 from __future__ import annotations
 
+import argparse
+import json
+import os
+import posixpath
 import subprocess
 import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from fnmatch import fnmatchcase
 try:
     from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 except ImportError:  # pragma: no cover - zoneinfo not available
@@ -18,20 +31,81 @@ ROOT = Path(__file__).resolve().parent
 COMMIT_DIR = ROOT / "commit"
 COMMIT_DIR.mkdir(exist_ok=True)
 FIELD_ORDER = ["status", "created", "type", "description", "commit_message", "files", "executed_at"]
+QUEUE_PATH = COMMIT_DIR / ".queue.jsonl"
+
 
+def load_entry(path: Path) -> Optional[Dict[str, Any]]:
+    data = parse_yaml_file(path)
+    if not data:
+        return None
+    data["_path"] = path
+    data["files"] = normalize_files(data.get("files"))
+    return data
 
-def load_entries() -> List[Dict[str, Any]]:
+
+def load_entries(paths: Optional[Iterable[Path]] = None) -> List[Dict[str, Any]]:
     entries: List[Dict[str, Any]] = []
-    for path in sorted(COMMIT_DIR.glob("*.yaml")):
-        data = parse_yaml_file(path)
-        if not data:
-            continue
-        data["_path"] = path
-        data["files"] = normalize_files(data.get("files"))
-        entries.append(data)
+    for path in sorted(COMMIT_DIR.glob("*.yaml") if paths is None else paths):
+        data = load_entry(path)
+        if data:
+            entries.append(data)
     return entries
 
 
+def is_done(entry: Dict[str, Any]) -> bool:
+    return str(entry.get("status", "pending")).strip().lower() == "done"
+
+
+def queue_record(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "file": entry["_path"].name,
+        "status": "done" if is_done(entry) else str(entry.get("status", "pending")),
+        "created": str(entry.get("created", "")),
+        "files": list(entry.get("files") or []),
+    }
+
+
+def read_queue() -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Letzter Datensatz je YAML-Datei und die Zeilenzahl (für die Verdichtung)."""
+    records: Dict[str, Dict[str, Any]] = {}
+    lines = 0
+    for line in QUEUE_PATH.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        lines += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict) and record.get("file"):
+            records[record["file"]] = record
+    return records, lines
+
+
+def append_queue(records: Iterable[Dict[str, Any]]) -> None:
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    if payload:
+        with QUEUE_PATH.open("a", encoding="utf-8", newline="\n") as handle:
+            handle.write(payload)
+
+
+def write_queue(records: Iterable[Dict[str, Any]]) -> None:
+    """Ersetzt den Index atomar (Migration und Verdichtung)."""
+    temp = QUEUE_PATH.with_name(QUEUE_PATH.name + ".tmp")
+    temp.write_text(
+        "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in sorted(records, key=lambda r: r["file"])),
+        encoding="utf-8",
+    )
+    os.replace(temp, QUEUE_PATH)
+
+
+def build_index() -> int:
+    """Migration: liest jede YAML einmal und schreibt `commit/.queue.jsonl` neu."""
+    entries = load_entries()
+    write_queue(queue_record(entry) for entry in entries)
+    return len(entries)
+
+
 def parse_yaml_file(path: Path) -> Optional[Dict[str, Any]]:
     raw = path.read_text(encoding="utf-8")
     parsed: Dict[str, Any] = {}
@@ -70,12 +144,38 @@ def normalize_files(value: Any) -> List[str]:
     return []
 
 
-def pending_entries(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    pending = []
-    for entry in entries:
-        status = str(entry.get("status", "pending")).strip().lower()
-        if status != "done":
+def pending_entries(entries: Optional[Iterable[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Offene Einträge; ohne `entries` über den Queue-Index.
+
+    Gelesen werden nur die Verzeichnisliste und die YAMLs offener oder noch nicht
+    indizierter Einträge; im Index erledigte Einträge werden nie wieder geöffnet.
+    Fehlt der Index, wird er einmal aus allen YAMLs aufgebaut. Wer einen erledigten
+    Eintrag von Hand zurücksetzt, braucht `--build-index`.
+    """
+    if entries is not None:
+        return [entry for entry in entries if not is_done(entry)]
+    if not QUEUE_PATH.exists():
+        build_index()
+    records, lines = read_queue()
+    names = {path.name for path in COMMIT_DIR.glob("*.yaml")}
+    to_read = sorted(name for name in names if records.get(name, {}).get("status") != "done")
+    pending: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for entry in load_entries(COMMIT_DIR / name for name in to_read):
+        record = queue_record(entry)
+        if records.get(record["file"]) != record:
+            updates.append(record)
+            records[record["file"]] = record
+        if not is_done(entry):
             pending.append(entry)
+    vanished = [name for name in records if name not in names]
+    for name in vanished:
+        del records[name]
+    # Ueberholte Zeilen sammeln sich an; ab doppelter Laenge wird das Log verdichtet.
+    if vanished or lines + len(updates) > 2 * max(len(records), 16):
+        write_queue(records.values())
+    else:
+        append_queue(updates)
     return pending
 
 
@@ -131,7 +231,7 @@ def parse_created(value: Any) -> datetime:
     return datetime.max
 
 
-def write_entry(path: Path, data: Dict[str, Any]) -> None:
+def render_entry(data: Dict[str, Any]) -> str:
     payload: Dict[str, Any] = {}
     for key in FIELD_ORDER:
         if key not in data:
@@ -153,7 +253,11 @@ def write_entry(path: Path, data: Dict[str, Any]) -> None:
             lines.append(f'{key}: "{escaped}"')
         else:
             lines.append(f"{key}: {value}")
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return "\n".join(lines) + "\n"
+
+
+def write_entry(path: Path, data: Dict[str, Any]) -> None:
+    path.write_text(render_entry(data), encoding="utf-8")
 
 
 def now_in_berlin() -> datetime:
@@ -165,12 +269,19 @@ def now_in_berlin() -> datetime:
     return datetime.now().astimezone()
 
 
-def commit_entries(entries: List[Dict[str, Any]]) -> None:
-    if not entries:
-        return
-    root = ROOT
+@dataclass
+class CommitPlan:
+    entry: Dict[str, Any]
+    message: str
+    done_data: Dict[str, Any]
+    specs: List[str]
+    paths: List[str] = field(default_factory=list)
+
+
+def plan_commits(entries: List[Dict[str, Any]]) -> List[CommitPlan]:
+    """Sortiert nach `created`, überspringt unvollständige Einträge und bereitet den done-Stand vor."""
+    plans: List[CommitPlan] = []
     for entry in sorted(entries, key=lambda e: parse_created(e.get("created"))):
-        path = entry.get("_path")
         files = entry.get("files") or []
         if not files:
             print(f"Übersprungen: '{entry.get('description', '<unbenannt>')}' (keine Dateien).")
@@ -179,26 +290,233 @@ def commit_entries(entries: List[Dict[str, Any]]) -> None:
         if not message:
             print(f"Übersprungen: '{entry.get('description', '<unbenannt>')}' (fehlende Commit-Nachricht).")
             continue
+        done_data = {key: value for key, value in entry.items() if not key.startswith("_")}
+        done_data["status"] = "done"
+        done_data["executed_at"] = now_in_berlin().isoformat()
+        plans.append(CommitPlan(entry, message, done_data, list(files)))
+    return plans
 
-        executed_at = now_in_berlin().isoformat()
-        entry["status"] = "done"
-        entry["executed_at"] = executed_at
-        if isinstance(path, Path):
-            data = dict(entry)
-            data.pop("_path", None)
-            write_entry(path, data)
 
-        print(f"Commit: {message}")
+def mark_done(plan: CommitPlan) -> None:
+    plan.entry.update(plan.done_data)
+    path = plan.entry.get("_path")
+    if isinstance(path, Path):
+        write_entry(path, plan.done_data)
+
+
+def git(args: List[str], cwd: Path = ROOT, stdin: Optional[bytes] = None) -> bytes:
+    result = subprocess.run(["git", *args], cwd=str(cwd), input=stdin, capture_output=True, check=True)
+    return result.stdout
+
+
+def git_text(args: List[str], cwd: Path = ROOT) -> str:
+    return git(args, cwd).decode("utf-8").strip()
+
+
+def spec_matches(path: str, spec: str) -> bool:
+    """Wie ein git-Pfadspec: exakte Datei, Ordner-Präfix oder Glob."""
+    spec = spec.rstrip("/")
+    if path == spec or path.startswith(spec + "/") or spec in ("", "."):
+        return True
+    return any(ch in spec for ch in "*?[") and fnmatchcase(path, spec)
+
+
+def quote_path(path: str) -> str:
+    if not any(ch in path for ch in '\n"\\') and not path.startswith('"'):
+        return path
+    escaped = path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def ident_name(variable: str) -> Tuple[str, str]:
+    """`Name <mail> 1700000000 +0100` -> (`Name <mail>`, `+0100`)."""
+    name, _, tz = git_text(["var", variable]).rsplit(" ", 2)
+    return name, tz
+
+
+def file_mode(path: Path) -> str:
+    info = path.lstat()
+    if path.is_symlink():
+        return "120000"
+    return "100755" if info.st_mode & 0o111 else "100644"
+
+
+def commit_entries_batch(plans: List[CommitPlan]) -> List[CommitPlan]:
+    """Alle Commits in einem `git fast-import`-Lauf; liefert die erfolgreich geschriebenen Pläne.
+
+    Dateiinhalte werden in einem einzigen `git hash-object -w --stdin-paths` gespeichert.
+    Eintrags-YAMLs gehen mit Status `done` in den Commit, auf der Platte wird dieser
+    Stand aber erst nach erfolgreichem Import geschrieben. Der Import ist atomar: schlägt
+    er fehl, bleibt der Branch unverändert und kein Eintrag wird als erledigt markiert.
+    """
+    top = Path(git_text(["rev-parse", "--show-toplevel"]))
+    try:
+        ref = git_text(["symbolic-ref", "-q", "HEAD"])
+    except subprocess.CalledProcessError:
+        raise SystemExit("HEAD ist losgelöst; Batch-Commits brauchen einen Branch (oder --sequential).")
+    try:
+        parent: Optional[str] = git_text(["rev-parse", "-q", "--verify", "HEAD"])
+    except subprocess.CalledProcessError:
+        parent = None
+    prefix = ROOT.resolve().relative_to(top.resolve()).as_posix()
+    prefix = "" if prefix == "." else prefix
+
+    def repo_path(spec: str) -> str:
+        return posixpath.normpath(posixpath.join(prefix, spec)) if prefix else posixpath.normpath(spec)
+
+    specs = sorted({spec for plan in plans for spec in plan.specs})
+    listed = git(["ls-files", "-z", "--full-name", "--cached", "--others", "--exclude-standard", "--", *specs])
+    candidates = sorted({path for path in listed.decode("utf-8").split("\0") if path})
+
+    overrides: Dict[str, bytes] = {}
+    ready: List[CommitPlan] = []
+    for plan in plans:
+        entry_path = plan.entry.get("_path")
+        own = repo_path(entry_path.relative_to(ROOT).as_posix()) if isinstance(entry_path, Path) else None
+        missing = []
+        paths: List[str] = []
+        for spec in plan.specs:
+            full = repo_path(spec)
+            matched = [path for path in candidates if spec_matches(path, full)]
+            if not matched and full != own:
+                missing.append(spec)
+            paths.extend(matched)
+        if missing:
+            print(f"Übersprungen: '{plan.message}' (nicht gefunden oder ignoriert: {', '.join(missing)}).")
+            continue
+        if own is not None and any(spec_matches(own, repo_path(spec)) for spec in plan.specs):
+            overrides[own] = render_entry(plan.done_data).encode("utf-8")
+            paths.append(own)
+        plan.paths = sorted(set(paths))
+        ready.append(plan)
+    if not ready:
+        return []
+
+    disk_paths = sorted(
+        {
+            path
+            for plan in ready
+            for path in plan.paths
+            if path not in overrides and (top / path).exists() and not (top / path).is_symlink()
+        }
+    )
+    hashes: Dict[str, str] = {}
+    if disk_paths:
+        output = git(["hash-object", "-w", "--stdin-paths"], cwd=top, stdin="".join(f"{path}\n" for path in disk_paths).encode("utf-8"))
+        hashes = dict(zip(disk_paths, output.decode("ascii").split()))
+
+    author, author_tz = ident_name("GIT_AUTHOR_IDENT")
+    committer, committer_tz = ident_name("GIT_COMMITTER_IDENT")
+    stream: List[bytes] = []
+    # Spaetere Eintraege sehen die done-Fassung frueherer YAMLs, nicht den Stand auf der Platte.
+    committed_yaml: Dict[str, bytes] = {}
+    for mark, plan in enumerate(ready, start=1):
+        message = plan.message.strip().encode("utf-8") + b"\n"
+        stamp = int(time.time())
+        stream.append(f"commit {ref}\nmark :{mark}\n".encode("utf-8"))
+        stream.append(f"author {author} {stamp} {author_tz}\n".encode("utf-8"))
+        stream.append(f"committer {committer} {stamp} {committer_tz}\n".encode("utf-8"))
+        stream.append(f"data {len(message)}\n".encode("utf-8") + message)
+        if mark == 1 and parent:
+            stream.append(f"from {parent}\n".encode("utf-8"))
+        entry_path = plan.entry.get("_path")
+        own = repo_path(entry_path.relative_to(ROOT).as_posix()) if isinstance(entry_path, Path) else None
+        if own in overrides:
+            committed_yaml[own] = overrides[own]
+        for path in plan.paths:
+            disk = top / path
+            quoted = quote_path(path)
+            if path in committed_yaml:
+                data = committed_yaml[path]
+                stream.append(f"M 100644 inline {quoted}\ndata {len(data)}\n".encode("utf-8") + data + b"\n")
+            elif disk.is_symlink():
+                data = os.readlink(disk).encode("utf-8")
+                stream.append(f"M 120000 inline {quoted}\ndata {len(data)}\n".encode("utf-8") + data + b"\n")
+            elif path in hashes:
+                stream.append(f"M {file_mode(disk)} {hashes[path]} {quoted}\n".encode("utf-8"))
+            elif not disk.exists():
+                stream.append(f"D {quoted}\n".encode("utf-8"))
+        stream.append(b"\n")
+    stream.append(b"done\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        marks_file = Path(tmp) / "marks"
+        process = subprocess.run(
+            ["git", "fast-import", "--quiet", "--done", "--date-format=raw", f"--export-marks={marks_file}"],
+            cwd=str(top),
+            input=b"".join(stream),
+            capture_output=True,
+        )
+        if process.returncode != 0:
+            print(f"Fehler beim Batch-Commit, nichts als erledigt markiert:\n{process.stderr.decode('utf-8', 'replace').strip()}")
+            return []
+        marks = dict(line.split(" ", 1) for line in marks_file.read_text(encoding="utf-8").split("\n") if line)
+
+    for mark, plan in enumerate(ready, start=1):
+        mark_done(plan)
+        print(f"Commit: {plan.message} ({marks.get(f':{mark}', '?')[:7]})")
+    # Index der betroffenen Pfade auf den neuen HEAD setzen, sonst stuenden die alten Staende als Aenderung bereit.
+    touched = sorted({path for plan in ready for path in plan.paths})
+    git(
+        ["reset", "-q", "HEAD", "--pathspec-from-file=-", "--pathspec-file-nul"],
+        cwd=top,
+        stdin="".join(f":(top,literal){path}\0" for path in touched).encode("utf-8"),
+    )
+    return ready
+
+
+def commit_entries_sequential(plans: List[CommitPlan]) -> List[CommitPlan]:
+    """Je Eintrag `git add` + `git commit` (mit Hooks); die YAML wird bei Fehlern zurückgesetzt."""
+    done: List[CommitPlan] = []
+    for plan in plans:
+        path = plan.entry.get("_path")
+        previous = path.read_text(encoding="utf-8") if isinstance(path, Path) and path.exists() else None
+        if isinstance(path, Path):
+            write_entry(path, plan.done_data)
+        print(f"Commit: {plan.message}")
         try:
-            subprocess.run(["git", "add", *files], check=True, cwd=str(root))
-            subprocess.run(["git", "commit", "-m", message], check=True, cwd=str(root))
+            subprocess.run(["git", "add", *plan.specs], check=True, cwd=str(ROOT))
+            subprocess.run(["git", "commit", "-m", plan.message], check=True, cwd=str(ROOT))
         except subprocess.CalledProcessError as exc:
             print(f"Fehler beim Commit von {path}: {exc}")
+            if previous is not None:
+                path.write_text(previous, encoding="utf-8")
             continue
+        plan.entry.update(plan.done_data)
+        done.append(plan)
+    return done
+
+
+def commit_entries(entries: List[Dict[str, Any]], sequential: bool = False) -> List[CommitPlan]:
+    plans = plan_commits(entries)
+    if not plans:
+        return []
+    done = commit_entries_sequential(plans) if sequential else commit_entries_batch(plans)
+    append_queue(queue_record(plan.entry) for plan in done if isinstance(plan.entry.get("_path"), Path))
+    return done
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vorbereitete Commits aus commit/*.yaml ausführen")
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Je Eintrag git add + git commit (mit Hooks/Signatur) statt eines fast-import-Laufs",
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="commit/.queue.jsonl aus allen YAML-Dateien neu aufbauen (Migration, nach Handänderungen)",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
-    entries = pending_entries(load_entries())
+    args = parse_args()
+    if args.build_index:
+        print(f"Index mit {build_index()} Einträgen geschrieben: {QUEUE_PATH.relative_to(ROOT)}")
+        return
+    entries = pending_entries()
     entries.sort(key=lambda entry: parse_created(entry.get("created")))
     if not entries:
         print("Keine ausstehenden Commits.")
@@ -209,7 +527,7 @@ def main() -> None:
         print("Keine Commit-Auswahl getroffen.")
         return
     to_commit = [entries[idx - 1] for idx in sorted(chosen)]
-    commit_entries(to_commit)
+    commit_entries(to_commit, sequential=args.sequential)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""Schlanker Parser fuer den YAML-Frontmatter-Kopf der Kapitel in `docs/`.
+
+Gelesen wird nur der Kopfbereich bis zum schliessenden `---`; der Rest der
+Datei wird weder kopiert noch durchsucht. Statt des Inhalts liefert der Parser
+den Offset, an dem der Body beginnt.
+
+Gemessen mit scripts/bench_frontmatter.py ist das etwa 1,25-1,35x so schnell
+wie der fruehere Regex-Pfad (der keine Werte typisierte); der Kopf ist klein,
+der Gewinn bleibt also bescheiden.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+OPENING_RE = re.compile(r"\ufeff?[ \t\r\n]*---[^\S\n]*\n")
+WHITESPACE_RE = re.compile(r"[ \t\r\n]*")
+# `key: value` je Zeile; Kommentare und Zeilen ohne Doppelpunkt fallen heraus.
+PAIR_RE = re.compile(r"^[ \t]*([^\s#:][^:\n]*):(.*)", re.M)
+LIST_ITEM_RE = re.compile(r"^[ \t]*- ", re.M)
+# Nur kanonische Ganzzahlen; `3.10` oder `007` bleiben Text (Kapitel-IDs!).
+INT_RE = re.compile(r"[-+]?(?:0|[1-9]\d*)\Z")
+BOOL_VALUES = {"true": True, "false": False}
+# Haeufige Werte ohne Verzweigungen; Schreibweisen wie `TRUE` laufen ueber BOOL_VALUES.
+SCALAR_CONSTANTS = {"": "", "true": True, "false": False, "True": True, "False": False}
+NUMBER_START = frozenset("0123456789+-")
+
+
+def _unquote(value: str) -> str | None:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        inner = value[1:-1]
+        if value[0] == '"':
+            return inner.replace('\\"', '"')
+        return inner.replace("''", "'")
+    return None
+
+
+def parse_scalar(raw: str) -> Any:
+    value = raw.strip()
+    if value in SCALAR_CONSTANTS:
+        return SCALAR_CONSTANTS[value]
+    first = value[0]
+    if first == '"' and value[-1] == '"' and len(value) >= 2 and "\\" not in value:
+        return value[1:-1]
+    if first in "\"'":
+        quoted = _unquote(value)
+        if quoted is not None:
+            return quoted
+    elif first in "tTfF":
+        lowered = value.lower()
+        if lowered in BOOL_VALUES:
+            return BOOL_VALUES[lowered]
+    elif first in NUMBER_START:
+        if INT_RE.match(value):
+            return int(value)
+    elif first == "[" and value.endswith("]"):
+        inner = value[1:-1].strip()
+        return [parse_scalar(item) for item in inner.split(",")] if inner else []
+    return value
+
+
+def parse_frontmatter(text: str) -> tuple[dict, int]:
+    """Liefert `(frontmatter, body_offset)`; ohne Kopf `({}, 0)`.
+
+    Das Kopfende findet ein `str.find` nach `\n---`, die Paare ein `findall` ueber
+    genau diesen Ausschnitt; die zeilenweise Schleife laeuft nur noch, wenn der
+    Kopf Block-Listen (`- eintrag`) enthaelt.
+    """
+    opening = OPENING_RE.match(text)
+    if opening is None:
+        return {}, 0
+    header_start = opening.end()
+    header_end, after = _find_closing(text, header_start)
+    if header_end == -1:
+        return {}, 0
+    header = text[header_start:header_end]
+    if "- " not in header or LIST_ITEM_RE.search(header) is None:
+        fm = {key.rstrip(): parse_scalar(value) for key, value in PAIR_RE.findall(header)}
+    else:
+        fm = _parse_header_lines(header)
+    return fm, WHITESPACE_RE.match(text, after).end()
+
+
+def _find_closing(text: str, header_start: int) -> tuple[int, int]:
+    """(Beginn der `---`-Zeile, Position nach ihr) oder (-1, -1); sucht per `str.find` nach `\n---`."""
+    pos = header_start - 1
+    while True:
+        idx = text.find("\n---", pos)
+        if idx == -1:
+            return -1, -1
+        end = text.find("\n", idx + 4)
+        end = len(text) if end == -1 else end
+        if text[idx + 4 : end].isspace() or end == idx + 4:
+            return idx + 1, min(end + 1, len(text))
+        pos = idx + 4
+
+
+def _parse_header_lines(header: str) -> dict[str, Any]:
+    fm: dict[str, Any] = {}
+    list_key: str | None = None
+    for line in header.splitlines():
+        stripped = line.strip()
+        if list_key is not None and stripped.startswith("- "):
+            if not isinstance(fm[list_key], list):
+                fm[list_key] = []
+            fm[list_key].append(parse_scalar(stripped[2:]))
+            continue
+        list_key = None
+        if not stripped or stripped[0] == "#":
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip()
+        if value.strip():
+            fm[key] = parse_scalar(value)
+        else:
+            # Leerer Wert: bleibt "", solange keine `- `-Eintraege folgen.
+            fm[key] = ""
+            list_key = key
+    return fm
+
+
+def split_frontmatter(text: str) -> tuple[dict, str]:
+    fm, offset = parse_frontmatter(text)
+    return fm, text[offset:]
+
+
+def format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(format_value(item) for item in value) + "]"
+    safe = str(value).replace('"', '\\"')
+    return f'"{safe}"'
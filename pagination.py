@@ -0,0 +1,283 @@
+"""Vorab-Paginierung der A4-Kapitel fuer den Viewer.
+
+Jedes Kapitel wird in Bloecke zerlegt (ein Block = ein Top-Level-Element, wie es
+markdown-it im Viewer erzeugt), je Block wird die Hoehe aus den Werten in
+`viewer/viewer.css` geschaetzt und daraus der Seitenumbruch berechnet. Das
+Ergebnis landet als `pagination` im Bundle: je Datei die Blockanzahl und die
+Blockindizes, vor denen voraussichtlich eine neue Seite beginnt. Der Viewer legt
+die Bloecke seitenweise ab und misst nur noch einmal pro Seite; liegt die
+Schaetzung daneben, misst er fuer diese Seite wie bisher Knoten fuer Knoten.
+
+Die Blockhoehen werden je Kapitel-Inhalts-Hash in `.pagination_cache.json`
+gehalten, sodass nach einer Aenderung nur das geaenderte Kapitel neu zerlegt wird.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from pathlib import Path
+
+from frontmatter import parse_frontmatter
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # pragma: no cover
+    MarkdownIt = None
+
+ROOT = Path(__file__).resolve().parent
+CACHE_FILE = ROOT / ".pagination_cache.json"
+MODEL_VERSION = 1
+
+PX_PER_PT = 96 / 72
+PX_PER_MM = 96 / 25.4
+# .doc-page--a4: 297mm hoch, oben/unten je 10mm Rand + 10mm Kopf/Fuss + 5mm Abstand, 1px Rahmen.
+PAGE_CONTENT_HEIGHT = (297 - 2 * (10 + 10 + 5)) * PX_PER_MM - 2
+PAGE_CONTENT_WIDTH = (210 - 40 - 30) * PX_PER_MM - 2
+LINE_HEIGHT = 1.55
+BODY_FONT = 11 * PX_PER_PT
+CODE_FONT = BODY_FONT * 13 / 16
+# Mittlere Zeichenbreite einer Serifenschrift relativ zur Schriftgroesse.
+CHAR_WIDTH = 0.45
+HEADINGS = {1: (18, 0, 12), 2: (16, 16, 6), 3: (13, 12, 5)}
+IMAGE_HEIGHT = 300.0
+TABLE_CELL_PADDING = 2 * 4 * PX_PER_PT + 1
+
+FENCE_RE = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s")
+LIST_RE = re.compile(r"^\s{0,3}(?:[-*+]|\d+[.)])\s")
+HTML_COMMENT_RE = re.compile(r"^\s*<!--[\s\S]*-->\s*$")
+
+
+def text_lines(text: str, font: float = BODY_FONT, width: float = PAGE_CONTENT_WIDTH) -> int:
+    chars_per_line = max(1, int(width / (font * CHAR_WIDTH)))
+    lines = 0
+    for line in text.splitlines() or [""]:
+        lines += max(1, math.ceil(len(line.strip()) / chars_per_line))
+    return lines
+
+
+def block_height(kind: str, text: str, level: int = 0) -> tuple[float, float, float]:
+    """Schaetzt (margin_top, Hoehe, margin_bottom) eines Blocks in px."""
+    line = BODY_FONT * LINE_HEIGHT
+    if kind == "heading":
+        size, top, bottom = HEADINGS.get(level, (11, 0, 14.6))
+        font = size * PX_PER_PT
+        return top * PX_PER_PT, text_lines(text, font * 1.1) * font * LINE_HEIGHT, bottom * PX_PER_PT
+    if kind == "list":
+        items = [item for item in re.split(r"\n(?=\s{0,3}(?:[-*+]|\d+[.)])\s)", text) if item.strip()]
+        width = PAGE_CONTENT_WIDTH - 18 * PX_PER_PT
+        return 0.0, sum(text_lines(item, width=width) for item in items) * line, 8 * PX_PER_PT
+    if kind == "blockquote":
+        width = PAGE_CONTENT_WIDTH - 8 * PX_PER_PT
+        return 4 * PX_PER_PT, text_lines(text, width=width) * line, 10 * PX_PER_PT
+    if kind == "code":
+        rows = max(1, len(text.splitlines()))
+        return CODE_FONT, rows * CODE_FONT * LINE_HEIGHT, CODE_FONT
+    if kind == "table":
+        rows = [row for row in text.splitlines() if row.strip() and not set(row.strip()) <= set("|-: ")]
+        columns = max(1, max((row.count("|") for row in rows), default=1) - 1)
+        width = PAGE_CONTENT_WIDTH / columns
+        height = 0.0
+        for row in rows:
+            cells = [cell for cell in row.strip().strip("|").split("|")]
+            height += max(text_lines(cell, width=width) for cell in cells) * line + TABLE_CELL_PADDING
+        return 8 * PX_PER_PT, height, 8 * PX_PER_PT
+    if kind == "image":
+        return 0.0, IMAGE_HEIGHT, 8 * PX_PER_PT
+    if kind == "math":
+        return BODY_FONT, max(2, len(text.splitlines())) * line, BODY_FONT
+    if kind == "hr":
+        return 8.0, 2.0, 8.0
+    if kind == "html":
+        return 0.0, text_lines(text) * line, 0.0
+    return 0.0, text_lines(text) * line, 8 * PX_PER_PT
+
+
+def classify(text: str) -> str:
+    stripped = text.lstrip()
+    if stripped.startswith("!["):
+        return "image"
+    if stripped.startswith("$$"):
+        return "math"
+    return "paragraph"
+
+
+def blocks_from_tokens(body: str) -> list[tuple[str, str, int]]:
+    md = MarkdownIt("js-default", {"html": True, "typographer": True})
+    lines = body.splitlines()
+    blocks = []
+    for token in md.parse(body):
+        if token.level != 0 or token.nesting == -1 or not token.map:
+            continue
+        text = "\n".join(lines[token.map[0] : token.map[1]])
+        if token.type == "heading_open":
+            blocks.append(("heading", text.lstrip("# "), int(token.tag[1])))
+        elif token.type in {"bullet_list_open", "ordered_list_open"}:
+            blocks.append(("list", text, 0))
+        elif token.type == "blockquote_open":
+            blocks.append(("blockquote", text, 0))
+        elif token.type in {"fence", "code_block"}:
+            blocks.append(("code", token.content, 0))
+        elif token.type == "table_open":
+            blocks.append(("table", text, 0))
+        elif token.type == "hr":
+            blocks.append(("hr", "", 0))
+        elif token.type == "html_block":
+            # Reine Kommentare erzeugen im Viewer keinen Element-Knoten.
+            if not HTML_COMMENT_RE.match(token.content):
+                blocks.append(("html", text, 0))
+        elif token.type == "paragraph_open":
+            blocks.append((classify(text), text, 0))
+    return blocks
+
+
+def blocks_from_lines(body: str) -> list[tuple[str, str, int]]:
+    """Ersatz ohne markdown-it-py: Leerzeilen, Zaeune, Ueberschriften und Listen wie in Markdown."""
+    blocks: list[tuple[str, str, int]] = []
+    current: list[str] = []
+    fence = None
+
+    def flush():
+        if not current:
+            return
+        text = "\n".join(current)
+        current.clear()
+        if LIST_RE.match(text):
+            kind = "list"
+        elif text.lstrip().startswith(">"):
+            kind = "blockquote"
+        elif text.lstrip().startswith("|"):
+            kind = "table"
+        elif text.lstrip().startswith("<"):
+            if HTML_COMMENT_RE.match(text):
+                return
+            kind = "html"
+        else:
+            kind = classify(text)
+        if blocks and kind == "list" and blocks[-1][0] == "list":
+            # Lockere Listen (Leerzeile zwischen Punkten) bleiben ein <ul>.
+            blocks[-1] = ("list", blocks[-1][1] + "\n" + text, 0)
+        else:
+            blocks.append((kind, text, 0))
+
+    for line in body.splitlines():
+        if fence is not None:
+            current.append(line)
+            if line.strip().startswith(fence):
+                blocks.append(("code", "\n".join(current[1:-1]), 0))
+                current.clear()
+                fence = None
+            continue
+        match = FENCE_RE.match(line)
+        if match:
+            flush()
+            fence = match.group(1)
+            current.append(line)
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush()
+            blocks.append(("heading", line.strip().lstrip("#").strip(), len(heading.group(1))))
+            continue
+        if not line.strip():
+            flush()
+            continue
+        if line.strip() in {"---", "***", "___"} and not current:
+            blocks.append(("hr", "", 0))
+            continue
+        current.append(line)
+    if fence is not None:
+        blocks.append(("code", "\n".join(current[1:]), 0))
+        current.clear()
+    flush()
+    return blocks
+
+
+def chapter_blocks(text: str) -> list[list[float]]:
+    _, offset = parse_frontmatter(text)
+    body = text[offset:]
+    blocks = blocks_from_tokens(body) if MarkdownIt is not None else blocks_from_lines(body)
+    return [list(block_height(kind, block_text, level)) for kind, block_text, level in blocks]
+
+
+def load_cache() -> dict:
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MODEL_VERSION:
+        return {}
+    return data.get("chapters") or {}
+
+
+def save_cache(chapters: dict):
+    payload = {"version": MODEL_VERSION, "chapters": chapters}
+    tmp_path = CACHE_FILE.with_name(CACHE_FILE.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(CACHE_FILE)
+
+
+def normalize_flag(value) -> bool:
+    # Entspricht normalizeBoolean im Viewer.
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return False
+
+
+def plan_pages(index, manifest: list[dict]) -> dict[str, dict]:
+    """Berechnet je A4-Kapitel die Blockindizes, vor denen eine neue Seite beginnt.
+
+    Der Fluss entspricht `appendChapterAcrossPages` im Viewer: Kapitel fuellen die
+    offene Seite weiter, `force_new_page_before` beginnt eine neue Seite,
+    `page_break_after` schliesst sie.
+    """
+    cache = load_cache()
+    used: dict[str, list] = {}
+    plan: dict[str, dict] = {}
+    page_open = False
+    filled = 0.0
+    last_bottom = 0.0
+    for entry in manifest:
+        file_name = entry.get("file")
+        if not file_name or entry.get("visible_in_viewer") is False:
+            continue
+        if str(entry.get("layout") or "").strip().lower() != "a4":
+            continue
+        doc = index.get(file_name)
+        if doc is None:
+            continue
+        heights = cache.get(doc.content_hash)
+        if heights is None:
+            heights = chapter_blocks(doc.read())
+        used[doc.content_hash] = heights
+        if normalize_flag(entry.get("force_new_page_before")) and page_open:
+            page_open = False
+        breaks = []
+        for position, (top, height, bottom) in enumerate(heights):
+            if page_open:
+                # Vertikale Raender benachbarter Bloecke fallen zusammen.
+                needed = filled - last_bottom + max(top, last_bottom) + height + bottom
+                if filled and needed > PAGE_CONTENT_HEIGHT:
+                    breaks.append(position)
+                    page_open = False
+                else:
+                    filled = needed
+            if not page_open:
+                page_open = True
+                filled = top + height + bottom
+            last_bottom = bottom
+        if not page_open:
+            page_open, filled, last_bottom = True, 0.0, 0.0
+        plan[file_name] = {"blocks": len(heights), "breaks": breaks}
+        if normalize_flag(entry.get("page_break_after")):
+            page_open = False
+            filled = 0.0
+    if used.keys() != cache.keys():
+        save_cache(used)
+    return plan
@@ -0,0 +1,316 @@
+"""Paralleles PDF-Rendering: Kapitelgruppen gleichzeitig drucken und zu einer PDF zusammenfuegen.
+
+Gruppen werden nur dort getrennt, wo der Viewer ohnehin eine neue Seite beginnt
+(`page_break_after`, `force_new_page_before`), damit das Layout dem der
+Gesamt-PDF entspricht. Seitenzahlen im Fusszeilentext werden nach dem
+Paginieren ueber `DocsViewer.setPageNumberOffset` korrigiert.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import run2
+from pagination import normalize_flag
+
+PDF_CACHE_DIR = run2.ROOT / ".pdf_cache"
+PDF_CACHE_INDEX = PDF_CACHE_DIR / "index.json"
+
+
+def is_a4(entry: dict) -> bool:
+    return str(entry.get("layout") or "").strip().lower() == "a4"
+
+
+def visible_entries(manifest: list[dict]) -> list[dict]:
+    return [entry for entry in manifest if entry.get("visible_in_viewer") is not False and entry.get("file")]
+
+
+def split_segments(manifest: list[dict]) -> list[list[dict]]:
+    """Zerlegt die sichtbaren Kapitel an Stellen, an denen der Viewer eine neue Seite beginnt."""
+    segments: list[list[dict]] = []
+    page_open = False
+    for entry in visible_entries(manifest):
+        if is_a4(entry):
+            starts_fresh = not page_open or normalize_flag(entry.get("force_new_page_before"))
+        else:
+            # Nicht-A4-Kapitel lassen eine offene A4-Seite offen; spaetere Kapitel fuellen sie weiter.
+            starts_fresh = not page_open
+        if starts_fresh or not segments:
+            segments.append([entry])
+        else:
+            segments[-1].append(entry)
+        if is_a4(entry):
+            page_open = not normalize_flag(entry.get("page_break_after"))
+    return segments
+
+
+def group_segments(segments: list[list[dict]], groups: int, weights: dict[str, int]) -> list[list[dict]]:
+    """Fasst aufeinanderfolgende Segmente zu hoechstens `groups` etwa gleich schweren Gruppen zusammen."""
+    if not segments:
+        return []
+    groups = max(1, min(groups, len(segments)))
+    seg_weights = [sum(weights.get(entry["file"], 1) for entry in segment) for segment in segments]
+    target = sum(seg_weights) / groups
+    result: list[list[dict]] = [[]]
+    current = 0
+    for position, (segment, weight) in enumerate(zip(segments, seg_weights)):
+        remaining_segments = len(segments) - position
+        remaining_groups = groups - len(result)
+        if result[-1] and remaining_groups > 0 and (current >= target or remaining_segments <= remaining_groups):
+            result.append([])
+            current = 0
+        result[-1].extend(segment)
+        current += weight
+    return result
+
+
+def group_url(group: list[dict]) -> str:
+    params = [("render", "eager")] + [("file", entry["file"]) for entry in group]
+    return run2.VIEWER_HTML.as_uri() + "?" + urlencode(params)
+
+
+async def open_group(browser, group: list[dict]):
+    context = await browser.new_context(viewport=run2.VIEWPORT)
+    try:
+        page = await context.new_page()
+        await page.goto(group_url(group), wait_until="load")
+        await page.wait_for_function(run2.VIEWER_API_JS, timeout=run2.VIEWER_TIMEOUT_MS)
+        ready = await page.evaluate(run2.VIEWER_READY_JS, run2.VIEWER_TIMEOUT_MS)
+    except BaseException:
+        await context.close()
+        raise
+    info = {"pageCount": ready.get("pageCount", 0), "chapters": ready.get("chapters") or {}}
+    return context, page, info
+
+
+async def print_page(page, offset: int, part_path: Path):
+    await page.evaluate("offset => window.DocsViewer.setPageNumberOffset(offset)", offset)
+    await page.emulate_media(media="print")
+    await page.add_style_tag(content=run2.PRINT_CSS)
+    await page.evaluate(run2.VIEWER_SETTLE_JS)
+    await page.pdf(path=str(part_path), **run2.PDF_OPTIONS)
+
+
+async def load_and_print(browser, group: list[dict], offset: int, part_path: Path, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        context, page, _ = await open_group(browser, group)
+        try:
+            await print_page(page, offset, part_path)
+        finally:
+            await context.close()
+
+
+def known_offset(infos: list[dict | None], position: int) -> int | None:
+    """Startseite der Gruppe, sobald alle Gruppen davor paginiert sind, sonst `None`."""
+    total = 0
+    for info in infos[:position]:
+        if info is None:
+            return None
+        total += int(info.get("pageCount") or 0)
+    return total
+
+
+async def render_groups(groups: list[list[dict]], infos: list[dict | None], target_for, workers: int):
+    """Paginiert Gruppen ohne bekannte Seitenzahl, berechnet die Startseiten und druckt jede Gruppe mit Ziel.
+
+    `target_for(position, offset)` liefert den Zielpfad oder `None`, wenn die Gruppe nicht gedruckt werden muss.
+    Offen ist hoechstens ein Browser-Kontext je Worker: Eine Gruppe wird gleich beim Paginieren gedruckt,
+    wenn ihre Startseite schon feststeht, sonst geschlossen und im zweiten Durchgang neu geladen.
+    """
+    from playwright.async_api import async_playwright
+
+    semaphore = asyncio.Semaphore(workers)
+    infos = list(infos)
+    printed: set[int] = set()
+
+    async def measure(browser, position: int):
+        async with semaphore:
+            context, page, info = await open_group(browser, groups[position])
+            try:
+                infos[position] = info
+                offset = known_offset(infos, position)
+                if offset is not None:
+                    printed.add(position)
+                    target = target_for(position, offset)
+                    if target:
+                        await print_page(page, offset, target)
+            finally:
+                await context.close()
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch()
+        try:
+            pending = [position for position, info in enumerate(infos) if info is None]
+            await asyncio.gather(*(measure(browser, position) for position in pending))
+            offsets = page_offsets(infos)
+            jobs = []
+            for position, offset in enumerate(offsets):
+                if position in printed:
+                    continue
+                target = target_for(position, offset)
+                if target:
+                    jobs.append(load_and_print(browser, groups[position], offset, target, semaphore))
+            await asyncio.gather(*jobs)
+        finally:
+            await browser.close()
+    return infos, offsets
+
+
+def page_offsets(infos: list[dict]) -> list[int]:
+    offsets = []
+    total = 0
+    for info in infos:
+        offsets.append(total)
+        total += int(info.get("pageCount") or 0)
+    return offsets
+
+
+def load_pdf_writer():
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError("pypdf fehlt. Installiere es mit: pip install pypdf") from exc
+    return PdfReader, PdfWriter
+
+
+def merge_parts(part_paths: list[Path], outline: list[list[tuple[str, int]]], output_path: Path):
+    """Fuegt die Teil-PDFs in Reihenfolge zusammen und setzt je Kapitel ein Lesezeichen."""
+    PdfReader, PdfWriter = load_pdf_writer()
+    writer = PdfWriter()
+    start_page = 0
+    for part_path, bookmarks in zip(part_paths, outline):
+        reader = PdfReader(str(part_path))
+        writer.append(reader)
+        for title, relative_page in bookmarks:
+            if 0 <= relative_page < len(reader.pages):
+                writer.add_outline_item(title, start_page + relative_page)
+        start_page += len(reader.pages)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        writer.write(handle)
+    os.replace(tmp_path, output_path)
+    return start_page
+
+
+def chapter_bookmarks(group: list[dict], info: dict) -> list[tuple[str, int]]:
+    pages = info.get("chapters") or {}
+    bookmarks = []
+    for entry in group:
+        chapter_id = entry.get("id")
+        if chapter_id in pages and pages[chapter_id] >= 0:
+            title = f"{chapter_id} {entry.get('title') or ''}".strip()
+            bookmarks.append((title, pages[chapter_id]))
+    return bookmarks
+
+
+def render_pdf_parallel(output_path: Path, index, manifest: list[dict], workers: int):
+    run2.load_playwright()
+    load_pdf_writer()
+
+    weights = {doc.rel: doc.record.get("size", 1) for doc in index}
+    groups = group_segments(split_segments(manifest), workers, weights)
+    if not groups:
+        raise RuntimeError("Keine sichtbaren Kapitel zum Rendern.")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="docs-pdf-") as tmp_dir:
+        part_paths = [Path(tmp_dir) / f"part-{position:03d}.pdf" for position in range(len(groups))]
+        infos, _ = asyncio.run(
+            render_groups(groups, [None] * len(groups), lambda position, _: part_paths[position], workers)
+        )
+        rendered = time.perf_counter() - start
+        outline = [chapter_bookmarks(group, info) for group, info in zip(groups, infos)]
+        page_count = merge_parts(part_paths, outline, output_path)
+    expected = sum(int(info.get("pageCount") or 0) for info in infos)
+    if page_count != expected:
+        print(f"Hinweis: {page_count} PDF-Seiten, der Viewer hat {expected} Seiten paginiert.")
+    print(
+        f"{len(groups)} Gruppen mit {workers} Workern gerendert: "
+        f"{rendered * 1000:.0f} ms, Zusammenfuegen {(time.perf_counter() - start - rendered) * 1000:.0f} ms."
+    )
+
+
+def fragment_key(segment: list[dict], index, render_fp: str) -> str:
+    """Inhalts-Hash eines Fragments: Kapiteltexte, Layout-Flags und Viewer/Druck-Stand."""
+    digest = hashlib.sha1(render_fp.encode("utf-8"))
+    for entry in segment:
+        doc = index.get(entry["file"])
+        parts = [
+            entry["file"],
+            doc.content_hash if doc is not None else "",
+            str(entry.get("id") or ""),
+            str(entry.get("title") or ""),
+            str(entry.get("layout") or ""),
+            str(normalize_flag(entry.get("force_new_page_before"))),
+            str(normalize_flag(entry.get("page_break_after"))),
+        ]
+        digest.update("\x1f".join(parts).encode("utf-8") + b"\x1e")
+    return digest.hexdigest()[:24]
+
+
+def fragment_path(key: str, offset: int) -> Path:
+    # Die Startseite gehoert zum Schluessel, weil sie in den Fusszeilen steht.
+    return PDF_CACHE_DIR / f"{key}-p{offset}.pdf"
+
+
+def load_fragment_cache() -> dict:
+    try:
+        data = json.loads(PDF_CACHE_INDEX.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def prune_fragment_cache(keep: set[Path]):
+    for path in PDF_CACHE_DIR.glob("*.pdf"):
+        if path not in keep:
+            path.unlink()
+
+
+def render_pdf_incremental(output_path: Path, index, manifest: list[dict], workers: int):
+    """Rendert nur Fragmente, deren Inhalt oder Startseite sich geaendert hat, und fuegt alle zusammen."""
+    load_pdf_writer()
+    segments = split_segments(manifest)
+    if not segments:
+        raise RuntimeError("Keine sichtbaren Kapitel zum Rendern.")
+    render_fp = run2.pdf_fingerprint("", mode="fragment")
+    keys = [fragment_key(segment, index, render_fp) for segment in segments]
+    cache = load_fragment_cache()
+    infos = [cache.get(key) for key in keys]
+    PDF_CACHE_DIR.mkdir(exist_ok=True)
+
+    start = time.perf_counter()
+    rendered: list[int] = []
+
+    def target_for(position: int, offset: int):
+        path = fragment_path(keys[position], offset)
+        if path.exists():
+            return None
+        rendered.append(position)
+        return path
+
+    if all(info is not None for info in infos) and all(
+        fragment_path(key, offset).exists() for key, offset in zip(keys, page_offsets(infos))
+    ):
+        offsets = page_offsets(infos)
+    else:
+        run2.load_playwright()
+        infos, offsets = asyncio.run(render_groups(segments, infos, target_for, workers))
+    render_seconds = time.perf_counter() - start
+
+    part_paths = [fragment_path(key, offset) for key, offset in zip(keys, offsets)]
+    outline = [chapter_bookmarks(segment, info) for segment, info in zip(segments, infos)]
+    merge_parts(part_paths, outline, output_path)
+    new_cache = {key: info for key, info in zip(keys, infos)}
+    run2.write_atomic(PDF_CACHE_INDEX, [json.dumps(new_cache, indent=2, ensure_ascii=False)])
+    prune_fragment_cache(set(part_paths))
+    print(
+        f"{len(rendered)} von {len(segments)} Fragmenten neu gerendert "
+        f"({render_seconds * 1000:.0f} ms), Rest aus {PDF_CACHE_DIR.name}/ uebernommen."
+    )
@@ -0,0 +1,67 @@
+"""Vorab-Rendern der Kapitel zu HTML fuer das Bundle (`run2.py --prerender`).
+
+Gerendert wird mit der Kette des Viewers selbst (markdown-it, DOMPurify, KaTeX),
+damit das Ergebnis exakt dem entspricht, was der Browser sonst bei jedem Oeffnen
+erzeugt. Ergebnisse liegen je Kapitel-Inhalts-Hash und Viewer-Stand in
+`.prerender_cache/`; nur neue oder geaenderte Kapitel starten einen Browser.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+
+import run2
+
+PRERENDER_CACHE_DIR = run2.ROOT / ".prerender_cache"
+RENDER_CHAPTER_JS = "text => window.DocsViewer.renderChapterHtml(text)"
+
+
+def prerender_key(content_hash: str, assets_fp: str) -> str:
+    return hashlib.sha1(f"{assets_fp}:{content_hash}".encode("utf-8")).hexdigest()[:24]
+
+
+def render_missing(texts: dict[str, str]) -> dict[str, str]:
+    """Rendert `{key: markdown}` in einer Viewer-Seite im Prerender-Modus."""
+    sync_playwright = run2.load_playwright()
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        try:
+            page = run2.open_viewer_page(browser)
+            page.goto(run2.VIEWER_HTML.as_uri() + "?prerender=1", wait_until="load")
+            run2.wait_for_viewer(page)
+            return {key: page.evaluate(RENDER_CHAPTER_JS, text) for key, text in texts.items()}
+        finally:
+            browser.close()
+
+
+def prerender_chapters(index, manifest: list[dict]) -> dict[str, str]:
+    """Liefert `{datei: html}` fuer alle Kapitel im Manifest und raeumt veraltete Cache-Dateien auf."""
+    assets_fp = run2.viewer_assets_fingerprint()
+    keys: dict[str, str] = {}
+    missing: dict[str, str] = {}
+    for entry in manifest:
+        file_name = entry.get("file")
+        doc = index.get(file_name or "")
+        if doc is None:
+            continue
+        key = prerender_key(doc.content_hash, assets_fp)
+        keys[file_name] = key
+        if not (PRERENDER_CACHE_DIR / f"{key}.html").exists():
+            missing[key] = doc.read()
+
+    PRERENDER_CACHE_DIR.mkdir(exist_ok=True)
+    if missing:
+        start = time.perf_counter()
+        for key, html in render_missing(missing).items():
+            run2.write_atomic(PRERENDER_CACHE_DIR / f"{key}.html", [html])
+        print(f"{len(missing)} Kapitel vorgerendert ({(time.perf_counter() - start) * 1000:.0f} ms).")
+
+    used = {PRERENDER_CACHE_DIR / f"{key}.html" for key in keys.values()}
+    for stale in PRERENDER_CACHE_DIR.glob("*.html"):
+        if stale not in used:
+            stale.unlink()
+    return {
+        file_name: (PRERENDER_CACHE_DIR / f"{key}.html").read_text(encoding="utf-8")
+        for file_name, key in keys.items()
+    }
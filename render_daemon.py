@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Langlebiger Render-Daemon: haelt Chromium und die Viewer-Seite warm und erzeugt PDFs auf Anfrage.
+
+    python render_daemon.py                 # Daemon starten (Standard: serve)
+    python render_daemon.py render -o X.pdf # Bundle bauen und Auftrag an den Daemon schicken
+    python render_daemon.py stop            # Daemon beenden
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import socket
+import socketserver
+import sys
+import time
+from pathlib import Path
+
+import run2
+
+ROOT = Path(__file__).resolve().parent
+HOST = "127.0.0.1"
+PORT = 3001
+CONNECT_TIMEOUT = 0.5
+RENDER_TIMEOUT = 300.0
+
+
+class PdfRenderer:
+    """Ein Browser, eine Seite: Folgeauftraege laden nur noch `docs_bundle.js` neu.
+
+    Haben sich Viewer-JS/-CSS seit dem Laden der Seite geaendert, wird sie komplett neu geladen.
+    """
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.page = None
+        self.print_style = None
+        self.loaded = False
+        self.assets_fp = ""
+        self.launch_seconds = 0.0
+        self.jobs = 0
+
+    def start(self):
+        sync_playwright = run2.load_playwright()
+        start = time.perf_counter()
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch()
+        self.page = run2.open_viewer_page(self.browser)
+        self.launch_seconds = time.perf_counter() - start
+
+    def close(self):
+        if self.browser is not None:
+            self.browser.close()
+        if self.playwright is not None:
+            self.playwright.stop()
+
+    def load(self):
+        assets_fp = run2.viewer_assets_fingerprint()
+        if self.loaded and assets_fp == self.assets_fp:
+            self.page.emulate_media(media="screen")
+            if self.print_style is not None:
+                self.print_style.evaluate("element => element.remove()")
+                self.print_style = None
+            self.page.evaluate("() => window.DocsViewer.reloadBundle()")
+        else:
+            self.page.emulate_media(media="screen")
+            self.print_style = None
+            self.page.goto(run2.viewer_url(), wait_until="load")
+            self.loaded = True
+            self.assets_fp = assets_fp
+
+    def render(self, output_path: Path) -> dict:
+        timings = {}
+        if self.jobs == 0:
+            timings["launch"] = self.launch_seconds
+        try:
+            start = time.perf_counter()
+            self.load()
+            timings["load"] = time.perf_counter() - start
+            start = time.perf_counter()
+            ready = run2.wait_for_viewer(self.page)
+            timings["paginate"] = time.perf_counter() - start
+            timings.update(run2.viewer_phase_timings(ready))
+            start = time.perf_counter()
+            self.print_style = run2.print_pdf(self.page, output_path)
+            timings["print"] = time.perf_counter() - start
+        except Exception:
+            # Naechster Auftrag startet mit frischer Navigation statt mit einer halb kaputten Seite.
+            self.loaded = False
+            self.print_style = None
+            raise
+        self.jobs += 1
+        return timings
+
+
+class RenderServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+    def __init__(self, address, renderer: PdfRenderer):
+        super().__init__(address, RenderRequestHandler)
+        self.renderer = renderer
+        self.stop_requested = False
+
+
+class RenderRequestHandler(socketserver.StreamRequestHandler):
+    def reply(self, payload: dict):
+        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except json.JSONDecodeError as exc:
+            self.reply({"ok": False, "error": f"Ungueltige Anfrage: {exc}"})
+            return
+        command = request.get("cmd")
+        renderer = self.server.renderer
+        if command == "ping":
+            self.reply({"ok": True, "jobs": renderer.jobs, "launch": renderer.launch_seconds})
+        elif command == "stop":
+            self.server.stop_requested = True
+            self.reply({"ok": True})
+        elif command == "render":
+            output_path = Path(request.get("output") or ROOT / "Dokumentation.pdf").resolve()
+            try:
+                timings = renderer.render(output_path)
+            except Exception as exc:
+                self.reply({"ok": False, "error": str(exc)})
+                return
+            print(f"PDF erzeugt: {output_path} ({run2.format_timings(timings)})")
+            self.reply(
+                {
+                    "ok": True,
+                    "output": str(output_path),
+                    "timings": timings,
+                    "assets": renderer.assets_fp,
+                    "print_css": run2.PRINT_CSS,
+                }
+            )
+        else:
+            self.reply({"ok": False, "error": f"Unbekannter Befehl: {command}"})
+
+
+def send_request(payload: dict, timeout: float = RENDER_TIMEOUT) -> dict | None:
+    """Schickt eine Anfrage an den Daemon; `None`, wenn keiner laeuft."""
+    try:
+        with socket.create_connection((HOST, PORT), timeout=CONNECT_TIMEOUT) as conn:
+            conn.settimeout(timeout)
+            conn.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            data = conn.makefile("rb").readline()
+    except OSError:
+        return None
+    return json.loads(data) if data else None
+
+
+def request_render(output_path: Path) -> dict | None:
+    response = send_request({"cmd": "render", "output": str(output_path)})
+    if response is None:
+        return None
+    if not response.get("ok"):
+        raise RuntimeError(f"Render-Daemon: {response.get('error')}")
+    return response
+
+
+def serve() -> int:
+    renderer = PdfRenderer()
+    # Erst den Port belegen: ein zweiter Daemon bricht ab, bevor er Chromium startet.
+    try:
+        server = RenderServer((HOST, PORT), renderer)
+    except OSError as exc:
+        print(f"Port {PORT} belegt ({exc}); laeuft bereits ein Render-Daemon?")
+        return 1
+    try:
+        renderer.start()
+        print(f"Browser gestartet in {renderer.launch_seconds * 1000:.0f} ms.")
+        renderer.load()
+        run2.wait_for_viewer(renderer.page)
+        print(f"Render-Daemon lauscht auf {HOST}:{PORT}.")
+        while not server.stop_requested:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        renderer.close()
+    print("Render-Daemon beendet.")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render-Daemon fuer die PDF-Erzeugung.")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "render", "stop", "ping"])
+    parser.add_argument("-o", "--output", default=str(ROOT / "Dokumentation.pdf"), help="Zielpfad fuer die PDF.")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve()
+    if args.command == "render":
+        run2.build_docs_bundle(run2.ensure_manifest())
+        result = request_render(Path(args.output).resolve())
+        if result is None:
+            print("Kein Render-Daemon erreichbar.")
+            return 1
+        print(f"PDF erzeugt: {result['output']} ({run2.format_timings(result['timings'])})")
+        return 0
+    response = send_request({"cmd": args.command}, timeout=5.0)
+    if response is None:
+        print("Kein Render-Daemon erreichbar.")
+        return 1
+    print(json.dumps(response, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except Exception as exc:
+        print(f"Fehler: {exc}")
+        sys.exit(1)
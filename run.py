@@ -1,8 +1,14 @@
+from __future__ import annotations
+
+import argparse
 import atexit
+import hashlib
 import json
 import os
-import re
+import subprocess
 import sys
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
@@ -34,10 +40,23 @@ try:
 except ImportError:  # pragma: no cover
     Server = None
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover
+    FileSystemEventHandler = object
+    Observer = None
+
+from frontmatter import format_value, parse_frontmatter
+
 ROOT = Path(__file__).resolve().parent
 DOCS_DIR = ROOT / "docs"
 MANIFEST_FILE = DOCS_DIR / "doc_manifest.json"
 RUN_ID_FILE = ROOT / "run_id.json"
+DOC_CACHE_FILE = ROOT / ".doc_cache.json"
+DOC_CACHE_VERSION = 3
+WATCH_DEBOUNCE_SECONDS = 0.3
+WATCH_EVENT_TYPES = {"created", "modified", "deleted", "moved"}
 
 FRONT_FIELDS = [
     "status",
@@ -79,26 +98,6 @@ def parse_filename_meta(filename: Path) -> dict:
     return {"id": identifier, "title": title or identifier}
 
 
-def split_frontmatter(text: str):
-    match = re.match(r"^\ufeff?\s*---\s*\r?\n([\s\S]*?)---\s*(?:\r?\n)?", text)
-    if not match:
-        return {}, text
-    fm_text = match.group(1)
-    rest = text[match.end() :]
-    fm = {}
-    for line in fm_text.splitlines():
-        if ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        key = key.strip()
-        val = value.strip()
-        if val.lower() in {"true", "false"}:
-            fm[key] = val.lower() == "true"
-        else:
-            fm[key] = val.strip('"').strip("'")
-    return fm, rest
-
-
 def iter_markdown_files():
     if not DOCS_DIR.exists():
         return []
@@ -119,63 +118,282 @@ def build_frontmatter(meta: dict, existing: dict) -> str:
         "visible_in_viewer": existing.get("visible_in_viewer", True),
     }
     lines = ["---"]
-    for field in FRONT_FIELDS:
-        value = data[field]
-        if isinstance(value, bool):
-            lines.append(f"{field}: {'true' if value else 'false'}")
-        else:
-            safe = str(value).replace('"', '\\"')
-            lines.append(f'{field}: "{safe}"')
+    for key in FRONT_FIELDS:
+        lines.append(f"{key}: {format_value(data[key])}")
     for key, value in existing.items():
         if key in FRONT_FIELDS:
             continue
-        if isinstance(value, bool):
-            lines.append(f"{key}: {'true' if value else 'false'}")
-        else:
-            safe = str(value).replace('"', '\\"')
-            lines.append(f'{key}: "{safe}"')
+        lines.append(f"{key}: {format_value(value)}")
     lines.append("---\n")
     return "\n".join(lines)
 
 
-def sync_docs():
-    DOCS_DIR.mkdir(exist_ok=True)
-    for md_file in iter_markdown_files():
-        text = md_file.read_text(encoding="utf-8")
-        front, rest = split_frontmatter(text)
-        if front:
-            continue
+def load_doc_cache() -> dict:
+    try:
+        data = json.loads(DOC_CACHE_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != DOC_CACHE_VERSION:
+        return {}
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_doc_cache(records: dict):
+    payload = {"version": DOC_CACHE_VERSION, "files": records}
+    write_if_changed(DOC_CACHE_FILE, json.dumps(payload, ensure_ascii=False))
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    data = text.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+def build_manifest_entry(md_file: Path, front: dict) -> dict:
+    meta = parse_filename_meta(md_file)
+    # Unquotierte Ganzzahlen wie `id: 3` kommen als int an; das Manifest fuehrt Texte als str.
+    return {
+        "id": str(front.get("id", "") or meta["id"]),
+        "title": str(front.get("title", "") or meta["title"]),
+        "file": md_file.relative_to(DOCS_DIR).as_posix(),
+        "status": str(front.get("status", "")),
+        "layout": str(front.get("layout", "A4")),
+        "force_new_page_before": front.get("force_new_page_before", True),
+        "page_break_after": front.get("page_break_after", True),
+        "visible_in_viewer": front.get("visible_in_viewer", True),
+        "description": str(front.get("description", "")),
+    }
+
+
+def read_doc_text(raw: bytes) -> str:
+    # Gleiche Zeilenende-Normalisierung wie Path.read_text().
+    return raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def scan_doc(md_file: Path, cached: dict | None) -> tuple[dict, str | None]:
+    """Liefert Cache-Eintrag und Text einer Datei; liest sie nur bei Aenderungen neu ein.
+
+    Der Text ist None, wenn die Datei laut Groesse und mtime unveraendert ist.
+    """
+    stat = md_file.stat()
+    if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+        return cached, None
+    raw = md_file.read_bytes()
+    digest = hashlib.sha1(raw).hexdigest()
+    text = read_doc_text(raw)
+    if cached and cached.get("hash") == digest:
+        return {**cached, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, text
+    front, offset = parse_frontmatter(text)
+    if not front:
+        rest = text[offset:]
         meta = parse_filename_meta(md_file)
         fm_block = build_frontmatter(meta, front)
-        new_body = rest.lstrip("\n")
-        new_text = fm_block + new_body
+        new_text = fm_block + rest.lstrip("\n")
         if new_text != text:
             md_file.write_text(new_text, encoding="utf-8")
-    generate_manifest()
+            raw = md_file.read_bytes()
+            digest = hashlib.sha1(raw).hexdigest()
+            stat = md_file.stat()
+            text = read_doc_text(raw)
+            front, _ = parse_frontmatter(text)
+    record = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest,
+        "front": front,
+        "entry": build_manifest_entry(md_file, front),
+    }
+    return record, text
 
 
-def generate_manifest():
-    entries = []
-    for md_file in iter_markdown_files():
-        text = md_file.read_text(encoding="utf-8")
-        front, _ = split_frontmatter(text)
-        meta = parse_filename_meta(md_file)
-        file_id = front.get("id", "") or meta["id"]
-        file_title = front.get("title", "") or meta["title"]
-        entries.append(
-            {
-                "id": file_id,
-                "title": file_title,
-                "file": md_file.relative_to(DOCS_DIR).as_posix(),
-                "status": front.get("status", ""),
-                "layout": front.get("layout", "A4"),
-                "force_new_page_before": front.get("force_new_page_before", True),
-                "page_break_after": front.get("page_break_after", True),
-                "visible_in_viewer": front.get("visible_in_viewer", True),
-                "description": front.get("description", ""),
-            }
-        )
-    MANIFEST_FILE.write_text(json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8")
+@dataclass
+class DocEntry:
+    path: Path
+    rel: str
+    record: dict
+    scanned_text: str | None = field(default=None, repr=False, compare=False)
+
+    def read(self) -> str:
+        """Liefert den beim Scan gelesenen Text oder liest ihn von der Platte."""
+        if self.scanned_text is not None:
+            return self.scanned_text
+        return read_doc_text(self.path.read_bytes())
+
+    @property
+    def content_hash(self) -> str:
+        return self.record["hash"]
+
+    @property
+    def frontmatter(self) -> dict:
+        return self.record.get("front", {})
+
+    @property
+    def manifest_entry(self) -> dict:
+        return self.record["entry"]
+
+    @property
+    def id(self) -> str:
+        return self.manifest_entry["id"]
+
+    @property
+    def title(self) -> str:
+        return self.manifest_entry["title"]
+
+
+class DocIndex:
+    """Einmaliger Scan von docs/, geteilt von Frontmatter-Reparatur, Manifest und Bundle."""
+
+    def __init__(self, entries: list[DocEntry]):
+        self.entries = entries
+        self._by_rel = {entry.rel: entry for entry in entries}
+
+    @classmethod
+    def build(cls, changed: set[str] | None = None) -> "DocIndex":
+        """Scannt docs/; mit `changed` werden nur diese Pfade geprueft, der Rest kommt aus dem Cache.
+
+        Nur die Texte der geaenderten Pfade bleiben im Index, damit das Bundle sie nicht erneut liest;
+        ein kalter Aufbau verwirft sie, sonst hielte er alle Kapitel im Speicher.
+        """
+        cache = load_doc_cache()
+        entries = []
+        if changed is None or not cache:
+            for md_file in iter_markdown_files():
+                rel = md_file.relative_to(DOCS_DIR).as_posix()
+                record, _ = scan_doc(md_file, cache.get(rel))
+                entries.append(DocEntry(md_file, rel, record))
+        else:
+            for rel in sorted(set(cache) | changed):
+                md_file = DOCS_DIR / rel
+                if rel not in changed:
+                    entries.append(DocEntry(md_file, rel, cache[rel]))
+                elif md_file.is_file():
+                    record, text = scan_doc(md_file, cache.get(rel))
+                    entries.append(DocEntry(md_file, rel, record, text))
+        index = cls(entries)
+        if index.records() != cache:
+            save_doc_cache(index.records())
+        return index
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, rel: str) -> DocEntry | None:
+        return self._by_rel.get(rel)
+
+    def records(self) -> dict:
+        return {entry.rel: entry.record for entry in self.entries}
+
+    def manifest(self) -> list[dict]:
+        return [entry.manifest_entry for entry in self.entries]
+
+
+def sync_docs() -> DocIndex:
+    DOCS_DIR.mkdir(exist_ok=True)
+    index = DocIndex.build()
+    generate_manifest(index)
+    return index
+
+
+def generate_manifest(index: DocIndex | None = None) -> bool:
+    if index is None:
+        index = DocIndex.build()
+    return write_if_changed(MANIFEST_FILE, json.dumps(index.manifest(), indent=2, ensure_ascii=False))
+
+
+def changed_doc_rels(paths) -> set[str]:
+    rels = set()
+    for raw_path in paths:
+        path = Path(raw_path).resolve()
+        if path.suffix != ".md":
+            continue
+        try:
+            rels.add(path.relative_to(DOCS_DIR).as_posix())
+        except ValueError:
+            continue
+    return rels
+
+
+def update_docs(paths=None) -> DocIndex | None:
+    """Aktualisiert Manifest und Bundle nur fuer die geaenderten Pfade (None = alle)."""
+    if paths is None:
+        index = DocIndex.build()
+        rels = {entry.rel for entry in index}
+    else:
+        rels = changed_doc_rels(paths)
+        if not rels:
+            return None
+        index = DocIndex.build(changed=rels)
+    generate_manifest(index)
+    try:
+        from run2 import update_docs_bundle
+    except Exception as exc:  # pragma: no cover
+        print(f"Bundle konnte nicht aktualisiert werden: {exc}")
+        return index
+    update_docs_bundle(index, rels)
+    return index
+
+
+class DocsChangeHandler(FileSystemEventHandler):
+    """Sammelt Dateisystem-Events und baut nach einer Ruhephase genau einmal neu."""
+
+    def __init__(self, delay: float = WATCH_DEBOUNCE_SECONDS):
+        super().__init__()
+        self.delay = delay
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in WATCH_EVENT_TYPES:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        with self._lock:
+            self._pending.update(os.fsdecode(path) for path in paths if path)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._timer = None
+        with self._rebuild_lock:
+            try:
+                update_docs(pending)
+            except Exception as exc:  # pragma: no cover
+                print(f"Aktualisierung fehlgeschlagen: {exc}")
+
+
+def start_docs_observer():
+    if Observer is None:
+        return None
+    observer = Observer()
+    observer.schedule(DocsChangeHandler(), str(DOCS_DIR), recursive=True)
+    observer.daemon = True
+    observer.start()
+    atexit.register(observer.stop)
+    return observer
+
+
+def make_polling_callback(server):
+    def callback():
+        # livereload meldet nur die zuletzt geaenderte Datei; ohne Pfad komplett neu scannen.
+        filepath = getattr(server.watcher, "filepath", None)
+        update_docs({filepath} if filepath else None)
+
+    return callback
 
 
 def serve():
@@ -183,7 +401,11 @@ def serve():
         print("livereload ist nicht installiert; Manifest wurde dennoch aktualisiert.")
         return
     server = Server()
-    server.watch("docs/**/*.md", sync_docs)
+    if start_docs_observer() is None:
+        server.watch("docs/**/*.md", make_polling_callback(server))
+    elif not (ROOT / "viewer" / "docs_bundle.js").exists():
+        # Ohne Bundle laedt der Viewer die Kapitel direkt; sonst loest das neue Bundle den Reload aus.
+        server.watch("docs/**/*.md")
     server.watch("viewer/*.js")
     server.watch("viewer/*.css")
     server.watch("viewer/index.html")
@@ -200,6 +422,26 @@ def serve():
     )
 
 
+def start_render_daemon():
+    process = subprocess.Popen([sys.executable, str(ROOT / "render_daemon.py")], cwd=str(ROOT))
+    atexit.register(process.terminate)
+    print(f"Render-Daemon gestartet (PID {process.pid}).")
+    return process
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Viewer-Server mit Live-Reload fuer docs/.")
+    parser.add_argument(
+        "--render-daemon",
+        action="store_true",
+        help="Zusaetzlich render_daemon.py starten, damit run2.py --daemon ohne Browserstart rendert.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     sync_docs()
+    if args.render_daemon:
+        start_render_daemon()
     serve()
@@ -1,15 +1,51 @@
 import argparse
+import hashlib
 import json
+import os
 import sys
+import time
 import asyncio
 from pathlib import Path
 
+from pagination import MODEL_VERSION as PAGINATION_MODEL_VERSION, plan_pages
+
 
 ROOT = Path(__file__).resolve().parent
 DOCS_DIR = ROOT / "docs"
 MANIFEST_FILE = DOCS_DIR / "doc_manifest.json"
-BUNDLE_FILE = ROOT / "viewer" / "docs_bundle.js"
-VIEWER_HTML = ROOT / "viewer" / "index.html"
+VIEWER_DIR = ROOT / "viewer"
+BUNDLE_FILE = VIEWER_DIR / "docs_bundle.js"
+VIEWER_HTML = VIEWER_DIR / "index.html"
+CHUNK_DIR = VIEWER_DIR / "docs_chunks"
+BUNDLE_PREFIX = "window.DOCS_BUNDLE = "
+CHUNK_REGISTRY = "(window.DOCS_CHUNKS = window.DOCS_CHUNKS || {})"
+VIEWPORT = {"width": 1400, "height": 900}
+VIEWER_API_JS = "() => window.DocsViewer && typeof window.DocsViewer.whenReady === 'function'"
+VIEWER_READY_JS = """timeout => Promise.race([
+    window.DocsViewer.whenReady(),
+    new Promise((_, reject) => setTimeout(() => reject(new Error(`Viewer nach ${timeout} ms nicht bereit`)), timeout)),
+])"""
+VIEWER_SETTLE_JS = "() => window.DocsViewer.settleLayout()"
+VIEWER_TIMEOUT_MS = 60000
+PDF_OPTIONS = {
+    "format": "A4",
+    "print_background": True,
+    "prefer_css_page_size": True,
+    "scale": 1,
+    "margin": {"top": "0", "right": "0", "bottom": "0", "left": "0"},
+}
+FINGERPRINT_FILE = VIEWER_DIR / "docs_bundle.fingerprint.json"
+GENERATED_VIEWER_FILES = {BUNDLE_FILE.name, FINGERPRINT_FILE.name}
+PRINT_CSS = """
+@page { size: A4; margin: 0; }
+html, body { margin: 0; padding: 0; background: white !important; }
+.viewer-header, .status-message, .viewer-mobile-hint { display: none !important; }
+.viewer-outer, .viewer-shell { padding: 0 !important; margin: 0 !important; gap: 0 !important; }
+.doc-page { margin: 0 !important; border: none !important; outline: none !important; box-shadow: none !important; }
+.doc-page { page-break-after: auto !important; page-break-before: auto !important; }
+.doc-page.force-new-page-before { page-break-before: auto !important; }
+.doc-page.page-break-after { page-break-after: auto !important; }
+"""
 
 
 def ensure_manifest():
@@ -17,28 +53,224 @@ def ensure_manifest():
         from run import sync_docs
     except Exception as exc:  # pragma: no cover
         raise RuntimeError(f"run.py konnte nicht geladen werden: {exc}") from exc
-    sync_docs()
+    return sync_docs()
 
 
-def build_docs_bundle():
-    if not MANIFEST_FILE.exists():
-        raise FileNotFoundError(f"Manifest fehlt: {MANIFEST_FILE}")
-    manifest = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
-    files = {}
+def iter_bundle_files(index, manifest, skip=()):
+    for entry in manifest:
+        file_name = entry.get("file")
+        if not file_name or file_name in skip:
+            continue
+        doc = index.get(file_name)
+        if doc is None:
+            continue
+        yield file_name, doc.read()
+
+
+def build_docs_bundle(index=None, split=False, prerender=False):
+    if index is None:
+        index = ensure_manifest()
+    manifest = index.manifest()
+    pagination = plan_pages(index, manifest)
+    if split:
+        write_split_bundle(index, manifest, pagination=pagination)
+        return
+    html = {}
+    if prerender:
+        from prerender import prerender_chapters
+
+        html = prerender_chapters(index, manifest)
+    write_docs_bundle(manifest, iter_bundle_files(index, manifest, skip=html), pagination, html)
+
+
+def write_atomic(path: Path, chunks):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def write_docs_bundle(manifest, files, pagination=None, html=None):
+    """Schreibt das Bundle Kapitel fuer Kapitel, ohne den Gesamt-Payload im Speicher aufzubauen.
+
+    Kapitel mit vorgerendertem HTML stehen unter `html` statt unter `files`.
+    """
+
+    def entries(items):
+        for position, (file_name, text) in enumerate(items):
+            separator = ", " if position else ""
+            yield separator + json.dumps(file_name, ensure_ascii=False) + ": " + json.dumps(text, ensure_ascii=False)
+
+    def chunks():
+        yield BUNDLE_PREFIX + '{"manifest": ' + json.dumps(manifest, ensure_ascii=False) + ', "files": {'
+        yield from entries(files)
+        yield "}, \"pagination\": " + json.dumps(pagination or {}, ensure_ascii=False)
+        if html:
+            yield ', "html": {'
+            yield from entries(html.items())
+            yield "}"
+        yield "};"
+
+    write_atomic(BUNDLE_FILE, chunks())
+
+
+def write_split_bundle(index, manifest, reuse=None, changed=frozenset(), pagination=None):
+    """Ein inhaltsadressierter Chunk je Kapitel plus kleines Index-Bundle fuer das Lazy-Loading."""
+    CHUNK_DIR.mkdir(exist_ok=True)
+    reuse = reuse or {}
+    chunks = {}
     for entry in manifest:
         file_name = entry.get("file")
         if not file_name:
             continue
-        path = DOCS_DIR / file_name
-        if not path.exists():
+        previous = reuse.get(file_name)
+        if previous and file_name not in changed and (VIEWER_DIR / previous).exists():
+            chunks[file_name] = previous
+            continue
+        doc = index.get(file_name)
+        if doc is None:
+            continue
+        rel = f"{CHUNK_DIR.name}/{doc.content_hash[:16]}.js"
+        chunk_path = VIEWER_DIR / rel
+        if not chunk_path.exists():
+            digest = json.dumps(chunk_path.stem)
+            write_atomic(chunk_path, [f"{CHUNK_REGISTRY}[{digest}] = ", json.dumps(doc.read(), ensure_ascii=False), ";"])
+        chunks[file_name] = rel
+    used = {VIEWER_DIR / rel for rel in chunks.values()}
+    for stale in CHUNK_DIR.glob("*.js"):
+        if stale not in used:
+            stale.unlink()
+    payload = {"manifest": manifest, "chunks": chunks, "pagination": pagination or {}}
+    write_atomic(BUNDLE_FILE, [BUNDLE_PREFIX, json.dumps(payload, ensure_ascii=False), ";"])
+
+
+def bundle_fingerprint(index, manifest, split=False, prerender=False) -> str:
+    """Hash ueber Manifest, Bundle-Modus und die Inhalts-Hashes aller referenzierten Kapitel."""
+    digest = hashlib.sha1()
+    digest.update(b"split" if split else b"single")
+    if prerender:
+        # Vorgerendertes HTML haengt vom Viewer-Stand (markdown-it, KaTeX, Sanitizer) ab.
+        digest.update(f"prerender:{viewer_assets_fingerprint()}".encode("utf-8"))
+    digest.update(f"pagination:{PAGINATION_MODEL_VERSION}".encode("utf-8"))
+    digest.update(json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    for entry in manifest:
+        doc = index.get(entry.get("file") or "")
+        if doc is not None:
+            digest.update(f"\n{doc.rel}:{doc.content_hash}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def viewer_assets_fingerprint() -> str:
+    digest = hashlib.sha1()
+    for path in sorted(VIEWER_DIR.rglob("*")):
+        if not path.is_file() or path.name in GENERATED_VIEWER_FILES or CHUNK_DIR in path.parents:
             continue
-        files[file_name] = path.read_text(encoding="utf-8")
-    payload = {"manifest": manifest, "files": files}
-    js = "window.DOCS_BUNDLE = " + json.dumps(payload, ensure_ascii=False) + ";"
-    BUNDLE_FILE.write_text(js, encoding="utf-8")
+        digest.update(path.relative_to(VIEWER_DIR).as_posix().encode("utf-8"))
+        digest.update(hashlib.sha1(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def pdf_fingerprint(
+    bundle_fp: str,
+    mode: str = "single",
+    assets_fp: str | None = None,
+    print_css: str = PRINT_CSS,
+) -> str:
+    """`assets_fp`/`print_css` beschreiben den tatsaechlich gedruckten Viewer-Stand (der des Daemons kann aelter sein)."""
+    digest = hashlib.sha1()
+    for part in (mode, bundle_fp, assets_fp or viewer_assets_fingerprint(), print_css):
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_fingerprints() -> dict:
+    try:
+        data = json.loads(FINGERPRINT_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_fingerprints(data: dict):
+    write_atomic(FINGERPRINT_FILE, [json.dumps(data, indent=2, ensure_ascii=False)])
+
+
+def bundle_is_current(fingerprints: dict, bundle_fp: str) -> bool:
+    return BUNDLE_FILE.exists() and fingerprints.get("bundle") == bundle_fp
+
+
+def pdf_is_current(fingerprints: dict, output_path: Path, pdf_fp: str) -> bool:
+    record = (fingerprints.get("pdf") or {}).get(str(output_path))
+    if not record or record.get("fingerprint") != pdf_fp:
+        return False
+    try:
+        stat = output_path.stat()
+    except FileNotFoundError:
+        return False
+    return record.get("size") == stat.st_size and record.get("mtime_ns") == stat.st_mtime_ns
+
 
+def record_pdf(fingerprints: dict, output_path: Path, pdf_fp: str):
+    stat = output_path.stat()
+    fingerprints.setdefault("pdf", {})[str(output_path)] = {
+        "fingerprint": pdf_fp,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
 
-def render_pdf(output_path: Path):
+
+def load_docs_bundle():
+    try:
+        js = BUNDLE_FILE.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    if not js.startswith(BUNDLE_PREFIX):
+        return None
+    try:
+        payload = json.loads(js[len(BUNDLE_PREFIX) :].rstrip().rstrip(";"))
+    except json.JSONDecodeError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def update_docs_bundle(index, changed) -> bool:
+    """Tauscht nur die geaenderten Kapitel im vorhandenen Bundle aus."""
+    payload = load_docs_bundle()
+    if payload is None:
+        return False
+    manifest = index.manifest()
+    pagination = plan_pages(index, manifest)
+    if "chunks" in payload:
+        write_split_bundle(index, manifest, reuse=payload["chunks"], changed=changed, pagination=pagination)
+        return True
+    old_files = payload.get("files") or {}
+    old_html = payload.get("html") or {}
+    names = [entry.get("file") for entry in manifest if entry.get("file")]
+    unchanged = payload.get("manifest") == manifest and payload.get("pagination") == pagination
+    if unchanged and list(old_files) + list(old_html) == names and not set(names) & set(changed):
+        return False
+    # Geaenderte Kapitel verlieren ihr vorgerendertes HTML und werden bis zum naechsten
+    # `run2.py --prerender` im Browser gerendert; der Watcher startet dafuer keinen Browser.
+    html = {name: old_html[name] for name in names if name in old_html and name not in changed}
+
+    def files():
+        for file_name in names:
+            if file_name in html:
+                continue
+            if file_name in changed or file_name not in old_files:
+                doc = index.get(file_name)
+                if doc is None:
+                    continue
+                yield file_name, doc.read()
+            else:
+                yield file_name, old_files[file_name]
+
+    write_docs_bundle(manifest, files(), pagination, html)
+    return True
+
+
+def load_playwright():
     try:
         from playwright.sync_api import sync_playwright
     except Exception as exc:  # pragma: no cover
@@ -51,40 +283,62 @@ def render_pdf(output_path: Path):
 
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    return sync_playwright
+
+
+def viewer_url() -> str:
+    # Der Viewer rendert sonst lazy; fuer PDFs muss das ganze Dokument im DOM stehen.
+    return VIEWER_HTML.as_uri() + "?render=eager"
+
 
-    url = VIEWER_HTML.as_uri()
+def open_viewer_page(browser):
+    return browser.new_page(viewport=VIEWPORT)
+
+
+def viewer_phase_timings(ready: dict) -> dict:
+    """Phasenzeiten des Viewers (ms) als Sekunden, passend zu `format_timings`."""
+    return {f"viewer.{phase}": ms / 1000 for phase, ms in (ready.get("timings") or {}).items()}
+
+
+def wait_for_viewer(page) -> dict:
+    """Wartet auf das Bereit-Signal des Viewers; liefert Seitenzahl, Kapitelseiten und Phasenzeiten."""
+    page.wait_for_function(VIEWER_API_JS, timeout=VIEWER_TIMEOUT_MS)
+    return page.evaluate(VIEWER_READY_JS, VIEWER_TIMEOUT_MS)
+
+
+def print_pdf(page, output_path: Path):
+    page.emulate_media(media="print")
+    style = page.add_style_tag(content=PRINT_CSS)
+    page.evaluate(VIEWER_SETTLE_JS)
+    page.pdf(path=str(output_path), **PDF_OPTIONS)
+    return style
+
+
+def render_pdf(output_path: Path) -> dict:
+    sync_playwright = load_playwright()
+    url = viewer_url()
+    timings = {}
     with sync_playwright() as playwright:
+        start = time.perf_counter()
         browser = playwright.chromium.launch()
-        page = browser.new_page(viewport={"width": 1400, "height": 900})
+        page = open_viewer_page(browser)
+        timings["launch"] = time.perf_counter() - start
+        start = time.perf_counter()
         page.goto(url, wait_until="load")
-        page.wait_for_selector(".doc-page", state="attached", timeout=60000)
-        page.wait_for_function(
-            "document.getElementById('status') && document.getElementById('status').textContent.includes('Bereit')",
-            timeout=60000,
-        )
-        page.emulate_media(media="print")
-        page.add_style_tag(
-            content="""
-@page { size: A4; margin: 0; }
-html, body { margin: 0; padding: 0; background: white !important; }
-.viewer-header, .status-message, .viewer-mobile-hint { display: none !important; }
-.viewer-outer, .viewer-shell { padding: 0 !important; margin: 0 !important; gap: 0 !important; }
-.doc-page { margin: 0 !important; border: none !important; outline: none !important; box-shadow: none !important; }
-.doc-page { page-break-after: auto !important; page-break-before: auto !important; }
-.doc-page.force-new-page-before { page-break-before: auto !important; }
-.doc-page.page-break-after { page-break-after: auto !important; }
-"""
-        )
-        page.wait_for_timeout(500)
-        page.pdf(
-            path=str(output_path),
-            format="A4",
-            print_background=True,
-            prefer_css_page_size=True,
-            scale=1,
-            margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-        )
+        ready = wait_for_viewer(page)
+        timings["load"] = time.perf_counter() - start
+        timings.update(viewer_phase_timings(ready))
+        start = time.perf_counter()
+        print_pdf(page, output_path)
+        timings["print"] = time.perf_counter() - start
         browser.close()
+    print(f"{ready.get('pageCount', 0)} Seiten. {format_timings(timings)}")
+    return timings
+
+
+def format_timings(timings: dict) -> str:
+    parts = [f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in timings.items()]
+    return "Zeiten: " + (", ".join(parts) if parts else "keine")
 
 
 def main():
@@ -97,12 +351,93 @@ def main():
         default=str(ROOT / "Dokumentation.pdf"),
         help="Zielpfad fuer die PDF.",
     )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Bundle als Index plus einen Chunk je Kapitel schreiben (Lazy-Loading im Viewer).",
+    )
+    parser.add_argument(
+        "--prerender",
+        action="store_true",
+        help="Kapitel als fertiges HTML samt KaTeX ins Bundle schreiben (Cache in .prerender_cache/).",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="PDF ueber den laufenden Render-Daemon (render_daemon.py) erzeugen.",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        nargs="?",
+        const=0,
+        metavar="N",
+        help="Kapitelgruppen parallel in N Browser-Kontexten rendern und zusammenfuegen (ohne N: CPU-Kerne).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Nur geaenderte Kapitelfragmente neu rendern (Cache in .pdf_cache/), Worker wie --parallel.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Build-Cache ignorieren und Bundle sowie PDF neu erzeugen.",
+    )
     args = parser.parse_args()
+    if args.split and args.prerender:
+        parser.error("--prerender ist nur mit dem Einzel-Bundle moeglich, nicht mit --split.")
+    if args.daemon and (args.parallel is not None or args.incremental):
+        parser.error("--daemon rendert nur die Einzel-PDF, nicht mit --parallel oder --incremental.")
 
     output_path = Path(args.output).resolve()
-    ensure_manifest()
-    build_docs_bundle()
-    render_pdf(output_path)
+    index = ensure_manifest()
+    manifest = index.manifest()
+    fingerprints = {} if args.force else load_fingerprints()
+    bundle_fp = bundle_fingerprint(index, manifest, split=args.split, prerender=args.prerender)
+    if bundle_is_current(fingerprints, bundle_fp):
+        print("Bundle unveraendert, Neuaufbau uebersprungen.")
+    else:
+        build_docs_bundle(index, split=args.split, prerender=args.prerender)
+        fingerprints["bundle"] = bundle_fp
+        save_fingerprints(fingerprints)
+
+    parts_mode = args.parallel is not None or args.incremental
+    pdf_fp = pdf_fingerprint(bundle_fp, mode="parts" if parts_mode else "single")
+    if pdf_is_current(fingerprints, output_path, pdf_fp):
+        print(f"PDF ist aktuell: {output_path}")
+        return
+    workers = args.parallel or os.cpu_count() or 1
+    if args.incremental:
+        from pdf_parts import render_pdf_incremental
+
+        render_pdf_incremental(output_path, index, manifest, workers=workers)
+    elif args.parallel is not None:
+        from pdf_parts import render_pdf_parallel
+
+        render_pdf_parallel(output_path, index, manifest, workers=workers)
+    elif args.daemon:
+        from render_daemon import request_render
+
+        result = request_render(output_path)
+        if result is None:
+            print("Render-Daemon nicht erreichbar, rendere lokal.")
+            render_pdf(output_path)
+        else:
+            print(format_timings(result.get("timings") or {}))
+            # Der Daemon druckt mit dem Viewer-Stand seiner Seite; nur dieser Stand darf ins Fingerprint.
+            pdf_fp = pdf_fingerprint(
+                bundle_fp,
+                mode="single",
+                assets_fp=result.get("assets") or "unbekannt",
+                print_css=result.get("print_css") or "",
+            )
+            if result.get("print_css") != PRINT_CSS:
+                print("Hinweis: Render-Daemon nutzt veraltetes Druck-CSS; bitte neu starten.")
+    else:
+        render_pdf(output_path)
+    record_pdf(fingerprints, output_path, pdf_fp)
+    save_fingerprints(fingerprints)
     print(f"PDF erzeugt: {output_path}")
 
 
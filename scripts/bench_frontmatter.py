@@ -0,0 +1,112 @@
+"""Micro-Benchmark: frontmatter.parse_frontmatter gegen den bisherigen Regex-Pfad.
+
+Aufruf aus dem Repo-Root:
+    python scripts/bench_frontmatter.py --count 10000 --body-lines 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from frontmatter import parse_frontmatter  # noqa: E402
+
+LEGACY_RE = re.compile(r"^\ufeff?\s*---\s*\r?\n([\s\S]*?)---\s*(?:\r?\n)?")
+
+
+def legacy_split_frontmatter(text: str):
+    """Bisherige Implementierung aus run.py (vor dem frontmatter-Modul)."""
+    match = LEGACY_RE.match(text)
+    if not match:
+        return {}, text
+    fm_text = match.group(1)
+    rest = text[match.end() :]
+    fm = {}
+    for line in fm_text.splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key = key.strip()
+        val = value.strip()
+        if val.lower() in {"true", "false"}:
+            fm[key] = val.lower() == "true"
+        else:
+            fm[key] = val.strip('"').strip("'")
+    return fm, rest
+
+
+def build_corpus(count: int, body_lines: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = "Waermepumpe Puffer Vorlauf Ruecklauf Heizkreis Spreizung Volumenstrom Heizlast".split()
+    corpus = []
+    for idx in range(count):
+        header = (
+            "---\n"
+            'status: "done"\n'
+            f'id: "{idx // 10}.{idx % 10}"\n'
+            f'title: "Kapitel {idx}"\n'
+            'layout: "A4"\n'
+            f"force_new_page_before: {'true' if idx % 2 else 'false'}\n"
+            "page_break_after: false\n"
+            "visible_in_viewer: true\n"
+            "---\n\n"
+        )
+        body = "\n".join(
+            " ".join(rng.choice(words) for _ in range(12)) for _ in range(body_lines)
+        )
+        corpus.append(header + f"# Kapitel {idx}\n\n" + body + "\n")
+    return corpus
+
+
+def run_legacy(corpus: list[str]) -> float:
+    start = time.perf_counter()
+    for text in corpus:
+        legacy_split_frontmatter(text)
+    return time.perf_counter() - start
+
+
+def run_scanner(corpus: list[str]) -> float:
+    start = time.perf_counter()
+    for text in corpus:
+        parse_frontmatter(text)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="Anzahl synthetischer Kapitel")
+    parser.add_argument("--body-lines", type=int, default=200, help="Zeilen Fliesstext je Kapitel")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen (bester Wert zaehlt)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, args.body_lines, args.seed)
+    for text in corpus[:100]:
+        legacy_fm, legacy_rest = legacy_split_frontmatter(text)
+        fm, offset = parse_frontmatter(text)
+        if fm != legacy_fm or text[offset:] != legacy_rest:
+            print("Abweichendes Ergebnis zwischen Regex- und Scanner-Pfad.")
+            return 1
+
+    size_mb = sum(len(text) for text in corpus) / 1_000_000
+    # Abwechselnd messen, damit Schwankungen der Maschine beide Pfade gleich treffen.
+    legacy = scanner = float("inf")
+    for _ in range(args.repeat):
+        legacy = min(legacy, run_legacy(corpus))
+        scanner = min(scanner, run_scanner(corpus))
+    print(f"Korpus: {args.count} Kapitel, {size_mb:.1f} MB")
+    print(f"Regex (run.py alt):      {legacy * 1000:8.1f} ms  ({legacy / args.count * 1e6:6.2f} us/Kapitel)")
+    print(f"frontmatter.py Scanner:  {scanner * 1000:8.1f} ms  ({scanner / args.count * 1e6:6.2f} us/Kapitel)")
+    print(f"Faktor: {legacy / scanner:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -82,7 +82,17 @@ def terminate_pid(pid: int) -> bool:
     return False
 
 
+def stop_render_daemon() -> None:
+    try:
+        from render_daemon import send_request
+    except Exception:
+        return
+    if send_request({"cmd": "stop"}, timeout=5.0) is not None:
+        print("Render-Daemon wurde beendet.")
+
+
 def main() -> int:
+    stop_render_daemon()
     pid = load_saved_pid()
     if pid is None:
         print("Keine gespeicherte run.py-PID gefunden.")
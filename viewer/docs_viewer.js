@@ -14,6 +14,7 @@ const chapterPanelBackdrop = document.getElementById('chapter-panel-backdrop');
 const CHAPTER_HASH_PARAM = 'chapter';
 const chapterEntryMap = new Map();
 const chapterPageMap = new Map();
+const bundleChunkLoads = new Map();
 let globalPageNumber = 0;
 const paginationContext = {
   pageIndex: 0,
@@ -23,6 +24,16 @@ const paginationContext = {
 let currentSelectedChapterId = null;
 let pendingHoverChapterId = null;
 let availableChapters = [];
+let renderReady = null;
+let mathRenderPending = false;
+const LAZY_RENDER_MARGIN = '1500px 0px';
+let lazySegments = [];
+let lazyObserver = null;
+let lazyRenderQueue = Promise.resolve();
+let pageInsertionPoint = null;
+let renderedPageSink = null;
+const paginationStats = { fallbacks: 0 };
+let renderTimings = {};
 const VIEWER_SCALE_CLASS = 'viewer--scaled';
 const VIEWER_MIN_SCALE_CLASS = 'viewer--minscale';
 const VIEWER_SCALE_VAR = '--viewer-scale';
@@ -156,6 +167,113 @@ function readChapterIdFromHash() {
   return value ? value.trim() : null;
 }
 
+function readFileFilterFromQuery() {
+  // run2.py --parallel rendert Kapitelgruppen getrennt: viewer/index.html?file=a.md&file=b.md
+  const files = new URLSearchParams(window.location.search).getAll('file');
+  return files.length ? new Set(files) : null;
+}
+
+function setPageNumber(section, pageNumber) {
+  section.dataset.pageNumber = pageNumber.toString();
+  const footerRight = section.querySelector('.doc-page__footer-right');
+  if (footerRight) {
+    footerRight.textContent = `Seite ${pageNumber}`;
+  }
+}
+
+function setPageNumberOffset(offset) {
+  const pages = viewer.querySelectorAll('.doc-page');
+  pages.forEach((section, index) => setPageNumber(section, offset + index + 1));
+  return pages.length;
+}
+
+function renumberPages() {
+  // Noch nicht gerenderte Abschnitte zaehlen mit ihrer geschaetzten Seitenzahl.
+  let pageNumber = 0;
+  Array.from(viewer.children).forEach((element) => {
+    if (element.classList.contains('doc-segment-placeholder')) {
+      pageNumber += Number(element.dataset.estimatedPages) || 0;
+    } else if (element.classList.contains('doc-page')) {
+      pageNumber += 1;
+      setPageNumber(element, pageNumber);
+    }
+  });
+  globalPageNumber = pageNumber;
+}
+
+function createRenderReady() {
+  let settle = null;
+  const promise = new Promise((resolve, reject) => {
+    settle = { resolve, reject };
+  });
+  promise.catch(() => {});
+  return { promise, ...settle, settled: false };
+}
+
+function beginRenderCycle() {
+  // Ein Zyklus pro Ladevorgang; reloadBundle startet ihn schon vor dem Nachladen des Bundles.
+  if (!renderReady || renderReady.settled) {
+    renderReady = createRenderReady();
+    renderTimings = {};
+  }
+  return renderReady;
+}
+
+function addRenderTiming(phase, start) {
+  renderTimings[phase] = (renderTimings[phase] ?? 0) + (performance.now() - start);
+}
+
+function nextFrame() {
+  return new Promise((resolve) => requestAnimationFrame(() => resolve()));
+}
+
+async function finishRenderCycle(error) {
+  const cycle = beginRenderCycle();
+  if (error) {
+    cycle.settled = true;
+    cycle.reject(error);
+    window.dispatchEvent(new CustomEvent('docs-viewer-error', { detail: { message: String(error) } }));
+    return;
+  }
+  const start = performance.now();
+  await settleLayout();
+  addRenderTiming('fonts', start);
+  const detail = {
+    ...describePages(),
+    timings: { ...renderTimings },
+    paginationFallbacks: paginationStats.fallbacks,
+  };
+  cycle.settled = true;
+  cycle.resolve(detail);
+  window.dispatchEvent(new CustomEvent('docs-viewer-ready', { detail }));
+}
+
+async function settleLayout() {
+  // Schriften geladen und zwei Frames gelayoutet; ersetzt feste Wartezeiten vor dem Drucken.
+  if (document.fonts?.ready) {
+    await document.fonts.ready;
+  }
+  await nextFrame();
+  await nextFrame();
+}
+
+function whenRenderReady() {
+  return (renderReady ?? beginRenderCycle()).promise;
+}
+
+function describePages() {
+  const pages = Array.from(viewer.querySelectorAll('.doc-page'));
+  const chapters = {};
+  viewer.querySelectorAll('.chapter-anchor').forEach((anchor) => {
+    const chapterId = anchor.dataset.chapterId;
+    if (!chapterId || Object.prototype.hasOwnProperty.call(chapters, chapterId)) {
+      return;
+    }
+    chapters[chapterId] = pages.indexOf(anchor.closest('.doc-page'));
+  });
+  return { pageCount: pages.length, chapters };
+}
+
 function updateHashWithChapterId(chapterId) {
   const params = new URLSearchParams(window.location.hash?.replace(/^#/, '') ?? '');
   if (!chapterId) {
@@ -190,20 +308,37 @@ async function initViewer() {
     return;
   }
   initViewerScaling();
+  if (new URLSearchParams(window.location.search).has('prerender')) {
+    // Nur Render-Kette bereitstellen (renderChapterHtml), keine Kapitel laden.
+    statusEl.textContent = 'Bereit';
+    await finishRenderCycle();
+    return;
+  }
+  await loadDocument();
+}
 
+async function loadDocument() {
+  beginRenderCycle();
+  const loadStart = performance.now();
   try {
     const manifest = await loadManifest();
+    addRenderTiming('manifest', loadStart);
     if (!Array.isArray(manifest) || !manifest.length) {
       statusEl.textContent = 'Keine Kapitel vorhanden.';
       scheduleViewerScaleUpdate();
+      await finishRenderCycle();
       return;
     }
 
-    availableChapters = manifest.filter((chapter) => chapter?.visible_in_viewer !== false);
+    const fileFilter = readFileFilterFromQuery();
+    availableChapters = manifest.filter(
+      (chapter) => chapter?.visible_in_viewer !== false && (!fileFilter || fileFilter.has(chapter?.file))
+    );
     const chapters = availableChapters;
     if (!chapters.length) {
       statusEl.textContent = 'Keine sichtbaren Kapitel konfiguriert.';
       scheduleViewerScaleUpdate();
+      await finishRenderCycle();
       return;
     }
     const hashChapterId = readChapterIdFromHash();
@@ -214,27 +349,196 @@ async function initViewer() {
     }
 
     renderChapterMenu(chapters);
-    await renderChapters(chapters);
+    if (readRenderModeFromQuery() === 'lazy') {
+      await renderChaptersLazily(chapters);
+    } else {
+      await renderChapters(chapters);
+    }
     initPdfPreviewInteractions();
     scrollToChapter(currentSelectedChapterId, { behavior: 'auto' });
     statusEl.textContent = 'Bereit';
     scheduleViewerScaleUpdate();
     initScrollSpy();
+    renderTimings.total = performance.now() - loadStart;
+    await finishRenderCycle();
   } catch (error) {
     console.error(error);
     statusEl.textContent = 'Fehler beim Laden der Dokumentation.';
     scheduleViewerScaleUpdate();
+    await finishRenderCycle(error);
   }
 }
 
+function reloadDocsBundle() {
+  // Fuer den Render-Daemon: nur docs_bundle.js neu laden, Vendor-Skripte und Seite bleiben warm.
+  statusEl.textContent = 'Lade Dokumentation …';
+  beginRenderCycle();
+  return new Promise((resolve, reject) => {
+    const script = document.createElement('script');
+    script.src = new URL(`docs_bundle.js?t=${Date.now()}`, viewerScriptDir).href;
+    script.dataset.docsBundle = 'reload';
+    script.onload = () => {
+      document.querySelectorAll('script[data-docs-bundle="reload"]').forEach((element) => {
+        if (element !== script) element.remove();
+      });
+      viewer.innerHTML = '';
+      loadDocument();
+      resolve();
+    };
+    script.onerror = () => {
+      script.remove();
+      const error = new Error('docs_bundle.js konnte nicht neu geladen werden');
+      finishRenderCycle(error);
+      reject(error);
+    };
+    document.head.appendChild(script);
+  });
+}
+
+function readRenderModeFromQuery() {
+  // run2.py erzwingt ?render=eager, damit PDFs immer das ganze Dokument enthalten.
+  const mode = new URLSearchParams(window.location.search).get('render');
+  if (mode === 'eager' || typeof IntersectionObserver !== 'function') {
+    return 'eager';
+  }
+  return 'lazy';
+}
+
+function splitChapterSegments(chapters) {
+  // Wie pdf_parts.split_segments: getrennt wird nur, wo der Viewer ohnehin eine neue Seite beginnt.
+  const segments = [];
+  let pageOpen = false;
+  chapters.forEach((chapter) => {
+    const isA4 = normalizeLayout(chapter?.layout) === 'a4';
+    const startsFresh = !pageOpen || (isA4 && normalizeBoolean(chapter?.force_new_page_before));
+    if (startsFresh || !segments.length) {
+      segments.push([chapter]);
+    } else {
+      segments[segments.length - 1].push(chapter);
+    }
+    if (isA4) {
+      pageOpen = !normalizeBoolean(chapter?.page_break_after);
+    }
+  });
+  return segments;
+}
+
+function estimateSegmentPages(chapters) {
+  return chapters.reduce((total, chapter) => {
+    const plan = getPaginationPlan(chapter);
+    return total + (plan ? plan.breaks.length + 1 : 1);
+  }, 0);
+}
+
+function createSegmentPlaceholder(chapters) {
+  const placeholder = document.createElement('div');
+  placeholder.className = 'doc-segment-placeholder';
+  const estimatedPages = estimateSegmentPages(chapters);
+  placeholder.dataset.estimatedPages = estimatedPages.toString();
+  placeholder.style.setProperty('--segment-pages', estimatedPages.toString());
+  return placeholder;
+}
+
+async function renderChaptersLazily(chapters) {
+  lazyObserver?.disconnect();
+  resetPaginationContext();
+  chapterPageMap.clear();
+  globalPageNumber = 0;
+  lazySegments = splitChapterSegments(chapters).map((segment) => ({
+    chapters: segment,
+    placeholder: createSegmentPlaceholder(segment),
+    rendered: null,
+  }));
+  lazySegments.forEach((segment) => viewer.appendChild(segment.placeholder));
+  lazyObserver = new IntersectionObserver(handleSegmentIntersection, { rootMargin: LAZY_RENDER_MARGIN });
+  const first = findSegmentForChapter(currentSelectedChapterId) ?? lazySegments[0];
+  await renderSegment(first);
+  lazySegments.forEach((segment) => {
+    if (!segment.rendered) {
+      lazyObserver.observe(segment.placeholder);
+    }
+  });
+}
+
+function handleSegmentIntersection(entries) {
+  entries.forEach((entry) => {
+    if (!entry.isIntersecting) {
+      return;
+    }
+    const segment = lazySegments.find((candidate) => candidate.placeholder === entry.target);
+    if (segment) {
+      renderSegment(segment);
+    }
+  });
+}
+
+function findSegmentForChapter(chapterId) {
+  if (!chapterId) {
+    return null;
+  }
+  return lazySegments.find((segment) => segment.chapters.some((chapter) => chapter.id === chapterId)) ?? null;
+}
+
+function renderSegment(segment) {
+  if (!segment) {
+    return Promise.resolve();
+  }
+  if (!segment.rendered) {
+    // Abschnitte nacheinander rendern: Paginierung und Einfuegepunkt sind global.
+    segment.rendered = lazyRenderQueue = lazyRenderQueue
+      .then(() => renderSegmentNow(segment))
+      .catch((error) => console.error('Abschnitt konnte nicht gerendert werden', error));
+  }
+  return segment.rendered;
+}
+
+async function renderSegmentNow(segment) {
+  const { placeholder } = segment;
+  if (!placeholder.isConnected) {
+    return;
+  }
+  lazyObserver?.unobserve(placeholder);
+  const pages = [];
+  resetPaginationContext();
+  mathRenderPending = false;
+  pageInsertionPoint = placeholder;
+  renderedPageSink = pages;
+  try {
+    for (const chapter of segment.chapters) {
+      await appendChapter(chapter);
+    }
+  } finally {
+    pageInsertionPoint = null;
+    renderedPageSink = null;
+  }
+  if (mathRenderPending) {
+    const mathStart = performance.now();
+    pages.forEach((section) => renderMathContent(section));
+    addRenderTiming('math', mathStart);
+  }
+  placeholder.remove();
+  renumberPages();
+  if (segment.chapters.some((chapter) => chapter.id === currentSelectedChapterId)) {
+    markActiveChapter(currentSelectedChapterId);
+  }
+  scheduleViewerScaleUpdate();
+}
+
 async function renderChapters(chapters) {
+  lazyObserver?.disconnect();
+  lazySegments = [];
   resetPaginationContext();
   chapterPageMap.clear();
   globalPageNumber = 0;
+  mathRenderPending = false;
   for (const chapter of chapters) {
     await appendChapter(chapter);
   }
-  viewer.querySelectorAll('.doc-page').forEach((section) => renderMathContent(section));
+  if (mathRenderPending) {
+    const mathStart = performance.now();
+    viewer.querySelectorAll('.doc-page').forEach((section) => renderMathContent(section));
+    addRenderTiming('math', mathStart);
+  }
   scheduleViewerScaleUpdate();
 }
 
@@ -244,16 +548,13 @@ async function appendChapter(chapter) {
   }
 
   try {
-    const content = await fetchChapterContent(chapter.file);
-    const { content: body, frontmatter } = splitFrontmatter(content);
+    const { nodes, frontmatter } = await loadChapterNodes(chapter);
     const layoutFromFrontmatter = normalizeLayout(frontmatter?.layout);
     const layoutFromManifest = normalizeLayout(chapter?.layout);
     const layoutType = layoutFromFrontmatter || layoutFromManifest || '';
     const forceBefore = resolveBooleanFlag(frontmatter, chapter, 'force_new_page_before');
     const breakAfter = resolveBooleanFlag(frontmatter, chapter, 'page_break_after');
-    const rendered = markdown?.render(body) ?? body;
-    const safe = ensureSanitized(rendered);
-    const nodes = htmlStringToNodes(safe);
+    const paginateStart = performance.now();
     if (layoutType !== 'a4' && chapter?.id) {
       const anchor = document.createElement('div');
       anchor.className = 'chapter-anchor';
@@ -274,6 +575,7 @@ async function appendChapter(chapter) {
         pages.map((entry) => entry.section).filter(Boolean)
       );
     }
+    addRenderTiming('paginate', paginateStart);
 
     if (currentSelectedChapterId === chapter.id) {
       markActiveChapter(chapter.id);
@@ -283,11 +585,56 @@ async function appendChapter(chapter) {
   }
 }
 
+async function loadChapterNodes(chapter) {
+  const prerendered = getPrerenderedHtml(chapter.file);
+  if (prerendered !== null) {
+    // run2.py --prerender: HTML ist bereits bereinigt und die Formeln gesetzt; Flags kommen aus dem Manifest.
+    const start = performance.now();
+    const nodes = htmlStringToNodes(prerendered);
+    addRenderTiming('prerendered', start);
+    return { nodes, frontmatter: {} };
+  }
+  const fetchStart = performance.now();
+  const content = await fetchChapterContent(chapter.file);
+  addRenderTiming('fetch', fetchStart);
+  const markdownStart = performance.now();
+  const { content: body, frontmatter } = splitFrontmatter(content);
+  const nodes = htmlStringToNodes(renderMarkdownHtml(body));
+  addRenderTiming('markdown', markdownStart);
+  mathRenderPending = true;
+  return { nodes, frontmatter };
+}
+
+function renderMarkdownHtml(body) {
+  const rendered = markdown?.render(body) ?? body;
+  return ensureSanitized(rendered);
+}
+
+function renderChapterHtml(text) {
+  // Fuer run2.py --prerender: dieselbe Kette wie beim Anzeigen, nur ohne Seitenaufteilung.
+  const { content: body } = splitFrontmatter(text ?? '');
+  const container = document.createElement('div');
+  container.innerHTML = renderMarkdownHtml(body);
+  renderMathContent(container);
+  return container.innerHTML;
+}
+
+function getPrerenderedHtml(file) {
+  const html = getDocsBundle()?.html;
+  if (!html || !Object.prototype.hasOwnProperty.call(html, file)) {
+    return null;
+  }
+  return typeof html[file] === 'string' ? html[file] : null;
+}
+
 async function fetchChapterContent(file) {
   const bundle = getDocsBundle();
   if (bundle?.files && Object.prototype.hasOwnProperty.call(bundle.files, file)) {
     return bundle.files[file];
   }
+  if (bundle?.chunks && Object.prototype.hasOwnProperty.call(bundle.chunks, file)) {
+    return loadBundleChunk(bundle.chunks[file]);
+  }
   const url = new URL(file, docsBaseUrl);
   url.searchParams.set('t', Date.now().toString());
   const response = await fetch(url);
@@ -297,29 +644,92 @@ async function fetchChapterContent(file) {
   return response.text();
 }
 
+function loadBundleChunk(src) {
+  // Split-Bundle (run2.py --split): ein Skript je Kapitel, funktioniert auch unter file://.
+  const digest = src.split('/').pop().replace(/\.js$/, '');
+  if (Object.prototype.hasOwnProperty.call(window.DOCS_CHUNKS ?? {}, digest)) {
+    return Promise.resolve(window.DOCS_CHUNKS[digest]);
+  }
+  if (!bundleChunkLoads.has(digest)) {
+    const request = new Promise((resolve, reject) => {
+      const script = document.createElement('script');
+      script.src = new URL(src, viewerScriptDir).href;
+      script.onload = () => resolve(window.DOCS_CHUNKS?.[digest] ?? '');
+      script.onerror = () => {
+        bundleChunkLoads.delete(digest);
+        reject(new Error(`Kapitel-Chunk ${src} nicht geladen`));
+      };
+      document.head.appendChild(script);
+    });
+    bundleChunkLoads.set(digest, request);
+  }
+  return bundleChunkLoads.get(digest);
+}
+
 function splitFrontmatter(text) {
-  const match = text.match(/^\ufeff?\s*(?:---\s*[\s\S]*?---\s*)+/);
-  if (!match) {
+  // Liest nur den Kopfbereich zeilenweise; der Body wird erst am Ende einmal abgeschnitten.
+  let pos = skipFrontmatterWhitespace(text, text.charCodeAt(0) === 0xfeff ? 1 : 0);
+  let firstYaml = null;
+  let bodyStart = 0;
+  let block = readFrontmatterBlock(text, pos);
+  while (block) {
+    if (firstYaml === null) {
+      firstYaml = block.yaml;
+    }
+    pos = skipFrontmatterWhitespace(text, block.end);
+    bodyStart = pos;
+    block = readFrontmatterBlock(text, pos);
+  }
+  if (firstYaml === null) {
     return { frontmatter: {}, content: text };
   }
   const yamlParser =
     (typeof window !== 'undefined' && window.jsyaml) ||
     (typeof jsyaml !== 'undefined' ? jsyaml : null);
   let frontmatter = {};
-  const firstBlock = match[0].match(/---\s*([\s\S]*?)---/);
-  if (yamlParser?.load && firstBlock) {
+  if (yamlParser?.load) {
     try {
-      frontmatter = yamlParser.load(firstBlock[1]) ?? {};
+      frontmatter = yamlParser.load(firstYaml) ?? {};
     } catch (error) {
       console.warn('Frontmatter konnte nicht geparst werden', error);
     }
   }
   return {
     frontmatter,
-    content: text.slice(match[0].length),
+    content: text.slice(bodyStart),
   };
 }
 
+function skipFrontmatterWhitespace(text, pos) {
+  while (pos < text.length && /\s/.test(text[pos])) {
+    pos += 1;
+  }
+  return pos;
+}
+
+function readFrontmatterBlock(text, pos) {
+  let lineEnd = text.indexOf('\n', pos);
+  if (lineEnd === -1) {
+    lineEnd = text.length;
+  }
+  if (text.slice(pos, lineEnd).trim() !== '---') {
+    return null;
+  }
+  const yamlStart = lineEnd + 1;
+  let lineStart = yamlStart;
+  while (lineStart < text.length) {
+    lineEnd = text.indexOf('\n', lineStart);
+    if (lineEnd === -1) {
+      lineEnd = text.length;
+    }
+    if (text.slice(lineStart, lineEnd).trim() === '---') {
+      return { yaml: text.slice(yamlStart, lineStart), end: lineEnd + 1 };
+    }
+    lineStart = lineEnd + 1;
+  }
+  return null;
+}
+
 function htmlStringToNodes(html) {
   const template = document.createElement('template');
   template.innerHTML = html;
@@ -372,13 +782,10 @@ function appendChapterAcrossPages(chapter, nodes, { forceBefore, breakAfter }) {
   nodes.unshift(anchor);
   const pagesForChapter = [];
   let forceNewPageForNextNode = Boolean(forceBefore && paginationContext.currentPage);
-  nodes.forEach((node) => {
-    if (!node) {
-      return;
-    }
-    const page = appendNodeToPagination(node, { forceNewPage: forceNewPageForNextNode });
+  planPageChunks(nodes, getPaginationPlan(chapter)).forEach((chunk) => {
+    const pages = appendChunkToPagination(chunk, { forceNewPage: forceNewPageForNextNode });
     forceNewPageForNextNode = false;
-    registerChapterOnPage(chapter.id, page.section, pagesForChapter);
+    pages.forEach((page) => registerChapterOnPage(chapter.id, page.section, pagesForChapter));
   });
   if (!pagesForChapter.length && paginationContext.currentPage) {
     registerChapterOnPage(chapter.id, paginationContext.currentPage.section, pagesForChapter);
@@ -390,6 +797,55 @@ function appendChapterAcrossPages(chapter, nodes, { forceBefore, breakAfter }) {
   }
 }
 
+function getPaginationPlan(chapter) {
+  const plan = getDocsBundle()?.pagination?.[chapter?.file];
+  return plan && Array.isArray(plan.breaks) ? plan : null;
+}
+
+function planPageChunks(nodes, plan) {
+  // Vorab-Paginierung aus run2.py: Bloecke bis zum naechsten geplanten Umbruch bilden einen Abschnitt.
+  // Passt die Blockanzahl nicht (z. B. anderes HTML), wird wie bisher jeder Knoten einzeln gemessen.
+  const present = nodes.filter(Boolean);
+  const blocks = present.filter(
+    (node) => node.nodeType === Node.ELEMENT_NODE && !node.classList.contains('chapter-anchor')
+  );
+  if (!plan || blocks.length !== plan.blocks) {
+    return present.map((node) => [node]);
+  }
+  const breaks = new Set(plan.breaks);
+  const chunks = [[]];
+  let blockIndex = 0;
+  present.forEach((node) => {
+    const isBlock = blocks[blockIndex] === node;
+    if (isBlock && breaks.has(blockIndex) && chunks[chunks.length - 1].length) {
+      chunks.push([]);
+    }
+    chunks[chunks.length - 1].push(node);
+    if (isBlock) {
+      blockIndex += 1;
+    }
+  });
+  return chunks;
+}
+
+function appendChunkToPagination(chunk, { forceNewPage } = {}) {
+  // Der erste Knoten wird gemessen (er entscheidet ueber den Seitenwechsel), der Rest einmal gemeinsam.
+  const [first, ...rest] = chunk;
+  const pages = [appendNodeToPagination(first, { forceNewPage })];
+  if (!rest.length) {
+    return pages;
+  }
+  const { contentEl } = pages[0];
+  rest.forEach((node) => contentEl.appendChild(node));
+  if (contentEl.scrollHeight <= paginationContext.availableHeight + 1) {
+    return pages;
+  }
+  paginationStats.fallbacks += 1;
+  rest.forEach((node) => contentEl.removeChild(node));
+  rest.forEach((node) => pages.push(appendNodeToPagination(node)));
+  return pages;
+}
+
 function appendNodeToPagination(node, { forceNewPage } = {}) {
   let page = ensurePaginationPage(forceNewPage);
   const { contentEl } = page;
@@ -426,6 +882,7 @@ function registerChapterOnPage(chapterId, section, chapterPages) {
 }
 
 function resetPaginationContext() {
+  paginationStats.fallbacks = 0;
   paginationContext.pageIndex = 0;
   paginationContext.currentPage = null;
   paginationContext.availableHeight = 0;
@@ -495,7 +952,8 @@ function createChapterPage(chapter, { layoutType, pageIndex, forceNewPageBefore
     footer.appendChild(footerRight);
     section.appendChild(footer);
   }
-  viewer.appendChild(section);
+  viewer.insertBefore(section, pageInsertionPoint);
+  renderedPageSink?.push(section);
   return { section, contentEl };
 }
 
@@ -649,7 +1107,13 @@ function findChapterNode(chapterId) {
 
 function scrollToChapter(chapterId, options = {}) {
   const target = findChapterNode(chapterId);
-  if (!target) return;
+  if (!target) {
+    const segment = findSegmentForChapter(chapterId);
+    if (segment && !segment.rendered) {
+      renderSegment(segment).then(() => scrollToChapter(chapterId, options));
+    }
+    return;
+  }
   const behavior = options.behavior ?? (options.temporary ? 'auto' : 'smooth');
   target.scrollIntoView({ behavior, block: 'start' });
   if (!options.temporary) {
@@ -910,3 +1374,11 @@ window.addEventListener('DOMContentLoaded', () => {
   initViewer();
 });
 window.addEventListener('hashchange', handleHashChange);
+window.DocsViewer = {
+  reloadBundle: reloadDocsBundle,
+  setPageNumberOffset,
+  describePages,
+  whenReady: whenRenderReady,
+  renderChapterHtml,
+  settleLayout,
+};